@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+from collections import Counter
+
+
+def probes(scan, length):
+    """Return the number of probes with which the adaptive isolators find
+    the other end of a component of length characters, scanning up to scan
+    ends one by one before galloping and bisecting with a fanout of 2.
+    """
+    if length <= scan:
+        return length
+    n = scan
+    # the component ends after prev and no later than end
+    prev, end, diff = scan, scan + 1, 1
+    while True:
+        n += 1
+        if end >= length:
+            break
+        prev, end, diff = end, end + diff, diff * 2
+    lo, hi = 0, end - prev
+    while hi - lo > 1:
+        mid = lo + (hi - lo) // 2
+        n += 1
+        if prev + mid >= length:
+            hi = mid
+        else:
+            lo = mid
+    return n
+
+
+class LengthModel:
+    """
+    Distribution of the lengths of the components of isolated keyword
+    combinations, from which the adaptive isolators choose how many ends of
+    each component to scan one by one, as comp_aware_bin_split does, before
+    galloping and bisecting, as comp_aware_bin_split_2 does, so as to minimize
+    the expected number of probes.  Scanning takes fewer probes for components
+    of up to 3 or 4 characters, galloping for longer ones.
+    Usage:
+        model = LengthModel() - no lengths observed
+        kw = adaptive_bin_split(art, is_censored, model=model) - isolate,
+                                                                 observing kw
+        model.observe(kw) - observe the lengths of the components of kw
+        model.scan_limit() - number of ends to scan before galloping
+    """
+    def __init__(self, keywords=(), default=4):
+        """
+        :param keywords: keyword combinations whose component lengths to
+        observe, e.g., those of a store.KeywordStore
+        :param default: number of ends to scan before any length is observed
+        """
+        self.counts = Counter()
+        self.default = default
+        self.limit = None
+        for kw in keywords:
+            self.observe(kw)
+
+    def observe(self, kw):
+        """Add the lengths of the components of keyword combination kw"""
+        self.counts.update(len(k) for k in kw if k)
+        self.limit = None
+
+    def expected(self, scan):
+        """Return the mean number of probes to find the other end of a
+        component when scanning up to scan ends first.
+        """
+        total = sum(self.counts.values())
+        return sum(count * probes(scan, length)
+                   for length, count in self.counts.items()) / total
+
+    def scan_limit(self):
+        """Return the number of ends to scan before galloping which minimizes
+        the expected number of probes over the observed lengths.
+        """
+        if not self.counts:
+            return self.default
+        if self.limit is None:
+            self.limit = min(range(max(self.counts) + 1), key=self.expected)
+        return self.limit
+
+
+def main():
+    import argparse
+    import algorithms
+    import corpus
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Compare the mean queries of comp_aware_bin_split, '
+                    'comp_aware_bin_split_2 and adaptive_bin_split over '
+                    'corpora with components of different lengths.')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=1000)
+    args = parser.parse_args()
+    profiles = [(1, 1, 2), (2, 2, 4), (2, 4, 8), (2, 8, 16), (2, 16, 32),
+                (3, 1, 16), (1, 1, 64)]
+    names = ['comp_aware_bin_split', 'comp_aware_bin_split_2',
+             'adaptive_bin_split']
+    print('%-24s %12s %12s %12s' % ('arity, component length', 'scan',
+                                     'gallop', 'adaptive'))
+    for arity, lo, hi in profiles:
+        articles, keywords = corpus.generate(
+            args.articles, args.keywords, arity, args.length,
+            min_length=lo, max_length=hi)
+        sim = Simulator(articles, {frozenset(kw) for kw in keywords})
+        means = []
+        for name in names:
+            isolator = getattr(algorithms, name)
+            if name == 'adaptive_bin_split':
+                model = LengthModel()
+                isolator = lambda s, is_censored: \
+                    algorithms.adaptive_bin_split(s, is_censored, model=model)
+            sim.this_article = -1
+            sim.queries = 0
+            for art in sim.get_articles():
+                kw = isolator(art, sim.send_probe)
+                assert set(kw) in sim.kws_in_this_article()
+            means.append(sim.queries / len(articles))
+        print('%-24s %12.2f %12.2f %12.2f' %
+              ('%d, %d-%d' % (arity, lo, hi), *means))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import asyncio
+
+
+class RateLimiter:
+    """
+    Space out the messages sent from one account so that at most rate messages
+    are sent every period seconds.
+    """
+    def __init__(self, rate, period=1.0):
+        self.interval = period / rate
+        self.next_slot = None
+
+    def reserve(self, now):
+        """Reserve the next free slot and return how long to wait for it"""
+        slot = now if self.next_slot is None else max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        return slot - now
+
+
+class Dispatcher:
+    """
+    Send tests to an awaitable is_censored callback through a pool of
+    accounts, keeping at most concurrency tests in flight overall and, if rate
+    is given, sending at most rate tests every period seconds from each
+    account.
+    Usage:
+        dispatcher = Dispatcher(is_censored, accounts, concurrency=100, rate=5)
+        was_censored = await dispatcher.send(test) - calls
+                                         await is_censored(test, account)
+    """
+    def __init__(self, is_censored, accounts=(None,), concurrency=100,
+                 rate=None, period=1.0):
+        self.is_censored = is_censored
+        self.accounts = list(accounts)
+        self.limiters = [RateLimiter(rate, period) if rate else None
+                         for _ in self.accounts]
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.sent = 0
+
+    def pick(self, now):
+        """Return the index of the account to send the next test from and how
+        long to wait before sending it.
+        """
+        if self.limiters[0] is None:
+            return self.sent % len(self.accounts), 0.0
+        n = min(range(len(self.limiters)),
+                key=lambda n: max(now, self.limiters[n].next_slot or now))
+        return n, self.limiters[n].reserve(now)
+
+    async def send(self, test):
+        async with self.semaphore:
+            n, delay = self.pick(asyncio.get_running_loop().time())
+            self.sent += 1
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return await self.is_censored(test, self.accounts[n])
+
+
+async def isolate(isolator, dispatcher):
+    """Drive isolator to completion, sending each test it yields through
+    dispatcher.  Lists of tests are sent concurrently and answered with a list
+    of verdicts.
+    """
+    was_censored = None
+    while True:
+        try:
+            test = isolator.send(was_censored)
+        except StopIteration as e:
+            return e.value
+        if isinstance(test, list):
+            was_censored = list(await asyncio.gather(
+                *[dispatcher.send(t) for t in test]))
+        else:
+            was_censored = await dispatcher.send(test)
+
+async def isolate_many(isolators, is_censored, accounts=(None,),
+                       concurrency=100, rate=None, period=1.0):
+    """Concurrently drive many isolators from the coroutines-* variants on the
+    running event loop.
+    :param isolators: iterable of isolator generators
+    :param is_censored: coroutine function such that
+    await is_censored(test, account) returns whether the collection of strings
+    test is censored when sent from account
+    :param accounts: accounts to spread the tests over
+    :param concurrency: maximum number of tests in flight overall
+    :param rate: maximum number of tests sent from each account every period
+    seconds, or None for no limit
+    :return: list of the isolated keyword combinations, in the order of
+    isolators
+    """
+    dispatcher = Dispatcher(is_censored, accounts, concurrency, rate, period)
+    return await asyncio.gather(*[isolate(isolator, dispatcher)
+                                  for isolator in isolators])
+
+def main():
+    import contextvars
+    import time
+    from coroutines import comp_aware_bin_split
+    from simulator import Simulator
+    sim = Simulator()
+    latency = 0.05
+    article = contextvars.ContextVar('article')
+    async def is_censored(test, account):
+        separator = '\x00' # will be platform specific
+        await asyncio.sleep(latency) # network round-trip
+        return sim.send(separator.join(test), article=article.get())
+    async def isolate_article(n, art, dispatcher):
+        article.set(n)
+        return await isolate(comp_aware_bin_split(art), dispatcher)
+    async def isolate_articles():
+        dispatcher = Dispatcher(is_censored, accounts=['a', 'b'], rate=20)
+        return await asyncio.gather(
+            *[isolate_article(n, art, dispatcher)
+              for n, art in enumerate(sim.articles)])
+    start = time.perf_counter()
+    kws = asyncio.run(isolate_articles())
+    elapsed = time.perf_counter() - start
+    for n, kw in enumerate(kws):
+        sim.report_found_keyword(kw, article=n)
+        print(sim.query_log[n])
+    print('%d queries in %.2fs, versus %.2fs one at a time' %
+          (sim.queries, elapsed, sim.queries * latency))
+
+if __name__ == "__main__":
+    main()
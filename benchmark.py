@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import json
+import os
+import random
+import time
+import tracemalloc
+from functools import partial
+
+import corpus
+from adaptive import LengthModel
+from matcher import KeywordMatcher
+from oracle import VotingOracle
+from simulator import Simulator
+from spans import Probe
+
+VARIANTS = [
+    'algorithms',
+    'algorithms-left',
+    'algorithms-ordered',
+    'algorithms-left-ordered',
+    'coroutines',
+    'coroutines-left',
+    'coroutines-ordered',
+    'coroutines-left-ordered',
+]
+
+ISOLATORS = ['comp_aware_bin_split', 'comp_aware_bin_split_2',
+             'adaptive_bin_split']
+
+# isolate_all() sharing verdicts between its searches, and from scratch
+ALL = ['isolate_all', 'isolate_all_from_scratch']
+
+
+def percentile(values, p):
+    """Return the nearest-rank p-th percentile of values"""
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+def run(module, name, sim, allocations=False, votes=None, known=None,
+        index=False, verify=True):
+    """Isolate a keyword combination in every article of sim using isolator
+    name from module, and return a dict of statistics.
+    :param votes: maximum number of votes with which an oracle.VotingOracle
+    settles inconsistent verdicts, or None to trust every verdict
+    :param known: matcher.KeywordMatcher over keyword combinations known in
+    advance, to probe with the isolator's known_first() before falling back
+    to the isolator itself, or None
+    :param index: whether to answer probes from the simulator's occurrence
+    index of each article rather than by sending their messages
+    :param verify: whether the VotingOracle verifies each isolated combination
+    """
+    isolator = getattr(module, name)
+    coroutine = hasattr(module, 'isolate')
+    if name == 'adaptive_bin_split':
+        # learn the lengths of components over the whole run
+        isolator = partial(isolator, model=LengthModel())
+    if known is not None:
+        isolator = partial(module.known_first, known=known, isolator=isolator)
+    def is_censored(test):
+        separator = '\x00' # will be platform specific
+        if index and isinstance(test, Probe):
+            return sim.send_probe(test, separator)
+        return sim.send(separator.join(test))
+    oracle = None
+    if votes:
+        oracle = VotingOracle(is_censored, module.ORDERED, votes)
+    queries, correct = [], 0
+    sim.this_article = -1
+    if allocations:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for art in sim.get_articles():
+        if oracle and coroutine:
+            oracle.reset()
+            kw = oracle.isolate(lambda s, oracle:
+                                module.isolate(isolator(s), sim, oracle), art,
+                                verify=verify)
+        elif oracle:
+            oracle.reset()
+            kw = oracle.isolate(isolator, art, verify=verify)
+        elif coroutine:
+            kw = module.isolate(isolator(art), sim, is_censored)
+        else:
+            kw = isolator(art, is_censored)
+        queries.append(sim.query_log[sim.this_article])
+        found = sim.kws_in_this_article()
+        correct += set(kw) in found or tuple(kw) in found
+    return statistics(queries, correct, start, allocations)
+
+def run_all(module, sim, allocations=False, share=True):
+    """Isolate every keyword combination in every article of sim using
+    module's isolate_all(), and return a dict of statistics as does run(),
+    counting an article as correct if exactly its combinations are found.
+    :param share: whether isolate_all() shares verdicts between its searches,
+    rather than searching each string from scratch
+    """
+    coroutine = hasattr(module, 'isolate')
+    def is_censored(test):
+        separator = '\x00' # will be platform specific
+        return sim.send(separator.join(test))
+    queries, correct = [], 0
+    sim.this_article = -1
+    if allocations:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for art in sim.get_articles():
+        if coroutine:
+            kws = module.isolate(module.isolate_all(art, share=share), sim,
+                                 is_censored)
+        else:
+            kws = module.isolate_all(art, is_censored, share=share)
+        queries.append(sim.query_log[sim.this_article])
+        correct += sim.report_found_keywords(kws)
+    return statistics(queries, correct, start, allocations)
+
+def statistics(queries, correct, start, allocations=False):
+    """Return the dict of statistics of a run started at start, in
+    time.perf_counter() seconds, with the list of queries per article and
+    the number of articles correct.
+    """
+    wall_time = time.perf_counter() - start
+    result = {
+        'queries': {
+            'mean': sum(queries) / len(queries),
+            'p50': percentile(queries, 50),
+            'p99': percentile(queries, 99),
+        },
+        'wall_time': wall_time,
+        'correct': correct / len(queries),
+    }
+    if allocations:
+        result['peak_kib'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+def compare(results, baseline):
+    """Print the change in mean queries and wall time from baseline"""
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        print('%-50s queries %+7.2f%%  time %+7.2f%%' %
+              (key,
+               100 * (result['queries']['mean'] / old['queries']['mean'] - 1),
+               100 * (result['wall_time'] / old['wall_time'] - 1)))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark all variants of the isolation algorithms on a '
+                    'synthetic corpus.')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--arity', type=int, default=2)
+    parser.add_argument('--component-length', type=int, nargs=2,
+                        default=(2, 4), metavar=('MIN', 'MAX'))
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--per-article', type=int, default=1)
+    parser.add_argument('--alphabet', choices=sorted(corpus.ALPHABETS),
+                        default='cjk')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus',
+                        help='directory written by corpus.py to use instead '
+                             'of generating a corpus')
+    parser.add_argument('--variants', nargs='+', default=VARIANTS)
+    parser.add_argument('--false-positive', type=float, default=0.0,
+                        help='probability of reporting an uncensored message '
+                             'as censored')
+    parser.add_argument('--false-negative', type=float, default=0.0,
+                        help='probability of reporting a censored message as '
+                             'uncensored')
+    parser.add_argument('--votes', type=int,
+                        help='settle inconsistent verdicts by a majority '
+                             'of up to this many queries')
+    parser.add_argument('--no-verify', dest='verify', action='store_false',
+                        help='with --votes, do not verify isolated '
+                             'combinations, which are otherwise isolated '
+                             'again if verification fails')
+    parser.add_argument('--known', type=float, default=0.0,
+                        help='fraction of the keyword combinations known in '
+                             'advance, to probe before isolating')
+    parser.add_argument('--index', action='store_true',
+                        help="answer probes from the simulator's index of "
+                             "component occurrences in each article")
+    parser.add_argument('--all', action='store_true',
+                        help='isolate every combination in each article with '
+                             'isolate_all(), with and without sharing '
+                             'verdicts between its searches')
+    parser.add_argument('--allocations', action='store_true',
+                        help='trace peak memory, which slows down the runs')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare',
+                        help='JSON results of a previous run to compare with')
+    args = parser.parse_args()
+
+    if args.corpus:
+        articles = list(corpus.read_articles(
+            os.path.join(args.corpus, 'articles.jsonl.gz')))
+        keywords = corpus.read_keywords(
+            os.path.join(args.corpus, 'keywords.jsonl.gz'), ordered=True)
+    else:
+        articles, keywords = corpus.generate(
+            args.articles, args.keywords, args.arity, args.length,
+            args.per_article, *args.component_length, args.alphabet,
+            seed=args.seed)
+    noise = {'false_positive': args.false_positive,
+             'false_negative': args.false_negative, 'seed': args.seed}
+    unordered = Simulator(articles, {frozenset(kw) for kw in keywords},
+                          **noise)
+    ordered = Simulator(articles, set(keywords), **noise)
+    known = {}
+    if args.known:
+        sample = random.Random(args.seed).sample(
+            sorted(keywords), int(args.known * len(keywords)))
+        known = {unordered: KeywordMatcher(frozenset(kw) for kw in sample),
+                 ordered: KeywordMatcher(sample)}
+    results = {}
+    for variant in args.variants:
+        module = importlib.import_module(variant)
+        sim = ordered if variant.endswith('-ordered') else unordered
+        for name in ISOLATORS if not args.all else ALL:
+            key = '%s.%s' % (variant, name)
+            if args.all:
+                result = run_all(module, sim, args.allocations,
+                                 name == 'isolate_all')
+            else:
+                result = run(module, name, sim, args.allocations, args.votes,
+                             known.get(sim), args.index, args.verify)
+            results[key] = result
+            print('%-50s queries mean %7.2f p50 %4d p99 %4d  '
+                  'time %7.3fs  correct %5.1f%%' %
+                  (key, result['queries']['mean'], result['queries']['p50'],
+                   result['queries']['p99'], result['wall_time'],
+                   100 * result['correct']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)['results'])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+import inspect
+import json
+import time
+
+from dedup import fingerprint
+from isolation.generators import drive
+from isolation.machines import Machine
+from spans import Probe
+
+
+class Exhausted(Exception):
+    """Raised when a query budget or deadline does not allow a query"""
+
+
+class Budget:
+    """
+    Limit on the number of queries which an isolation may send and on the
+    wall-clock time by which it must finish.  A round of several probes sent
+    at once is only sent if the budget allows all of them.
+    Usage:
+        budget = Budget(queries=30, seconds=2.0) - start the clock
+        budget.spend(n) - spend n queries, raising Exhausted if not allowed
+        budget.spent - number of queries spent
+    """
+    def __init__(self, queries=None, seconds=None):
+        """
+        :param queries: maximum number of queries, or None for no limit
+        :param seconds: seconds from now by which to stop, or None for no
+        deadline
+        """
+        self.queries = queries
+        self.deadline = None if seconds is None else \
+            time.monotonic() + seconds
+        self.spent = 0
+
+    def spend(self, n=1):
+        """Spend n queries, raising Exhausted if the budget does not allow
+        them or the deadline has passed.
+        """
+        if self.queries is not None and self.spent + n > self.queries:
+            raise Exhausted('%d queries spent of %d' %
+                            (self.spent, self.queries))
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise Exhausted('deadline passed')
+        self.spent += n
+
+
+class Partial:
+    """
+    State of an isolation stopped by its budget, from which it can be resumed
+    without repeating any query: the fingerprint of the string searched, the
+    isolator and its parameters, the probes sent with the verdicts received,
+    or the record of an isolation.machines.Machine.  Only a Machine reports
+    the components found so far and the span of the string still to search,
+    which other isolators keep in their own variables.
+    Usage:
+        partial = isolate(isolator, s, is_censored, budget) - stopped
+        partial.found, partial.remaining - components found and (start, end)
+                                           of the span still to search, or
+                                           None unless isolator is a Machine
+        text = partial.dumps() - serialize, e.g., to store on disk
+        partial = Partial.loads(text) - deserialize
+        kw = isolate(isolator, s, is_censored, budget, partial) - resume
+    """
+    def __init__(self, key, verdicts=None, record=None, found=None,
+                 remaining=None):
+        """
+        :param key: dict of the fingerprint of the string searched and the
+        name and parameters of the isolator, as returned by key()
+        :param verdicts: list of the [key, verdict] pairs of the probes sent,
+        keyed by probe_key(), with lists of keys and of verdicts for a round
+        of several probes, or None for a Machine
+        :param record: state of a Machine, as returned by its dumps(), or None
+        :param found: list of the components found so far, or None if unknown
+        :param remaining: (start, end) of the span still to search, or None
+        if unknown
+        """
+        self.key = key
+        self.verdicts = verdicts
+        self.record = record
+        self.found = found
+        self.remaining = remaining
+
+    @staticmethod
+    def key(isolator, s, params):
+        """Return the key identifying the isolation of s by isolator with
+        keyword arguments params, which must serialize to JSON.
+        """
+        return json.loads(json.dumps({
+            'fingerprint': fingerprint(s).hex(),
+            'isolator': '%s.%s' % (isolator.__module__, isolator.__qualname__),
+            'params': params}))
+
+    def check(self, key):
+        """Raise ValueError unless the partial isolation has key"""
+        for name in ('fingerprint', 'isolator', 'params'):
+            if self.key[name] != key[name]:
+                raise ValueError('partial isolation has %s %r, not %r' %
+                                 (name, self.key[name], key[name]))
+
+    def dumps(self):
+        """Return the partial isolation as a JSON string"""
+        return json.dumps({'key': self.key, 'verdicts': self.verdicts,
+                           'record': self.record, 'found': self.found,
+                           'remaining': self.remaining}, ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, text):
+        """Return the partial isolation serialized as text by dumps()"""
+        saved = json.loads(text)
+        remaining = saved['remaining']
+        return cls(saved['key'], saved['verdicts'], saved['record'],
+                   saved['found'],
+                   None if remaining is None else tuple(remaining))
+
+    def __repr__(self):
+        return 'Partial(%s, found=%r, remaining=%r)' % (
+            self.key['isolator'], self.found, self.remaining)
+
+
+def probe_key(test):
+    """Return a key identifying test, a spans.Probe, a collection of strings
+    or a list of tests, which serializes to JSON as itself.
+    """
+    if isinstance(test, list):
+        return [probe_key(t) for t in test]
+    if isinstance(test, Probe):
+        key = test.key()
+        return [list(pair) for pair in
+                (sorted(key) if isinstance(key, frozenset) else key)]
+    return sorted(test) if isinstance(test, (set, frozenset)) else list(test)
+
+
+class Metered:
+    """
+    Answer an isolator's tests first from recorded verdicts, raising
+    ValueError if a test differs from the one recorded, and then with
+    is_censored within budget, recording every test and verdict.  Lists of
+    tests are answered as does isolation.generators.drive().
+    """
+    def __init__(self, is_censored, budget, verdicts=(), executor=None):
+        self.is_censored = is_censored
+        self.budget = budget
+        self.replay = list(verdicts)
+        self.verdicts = []
+        self.executor = executor
+
+    def replayed(self, key):
+        """Return the recorded verdict for the test with key, or None if all
+        recorded verdicts were replayed.
+        """
+        n = len(self.verdicts)
+        if n >= len(self.replay):
+            return None
+        recorded, was_censored = self.replay[n]
+        if recorded != key:
+            raise ValueError('test %d is %r, not %r as recorded' %
+                             (n, key, recorded))
+        return was_censored
+
+    def __call__(self, test):
+        key = probe_key(test)
+        was_censored = self.replayed(key)
+        if was_censored is None:
+            self.budget.spend()
+            was_censored = bool(self.is_censored(test))
+        self.verdicts.append([key, was_censored])
+        return was_censored
+
+    def batch(self, tests):
+        key = probe_key(tests)
+        verdicts = self.replayed(key)
+        if verdicts is None:
+            self.budget.spend(len(tests))
+            batch = getattr(self.is_censored, 'batch', None)
+            if batch:
+                verdicts = batch(tests)
+            elif self.executor is not None:
+                verdicts = self.executor.map(self.is_censored, tests)
+            else:
+                verdicts = map(self.is_censored, tests)
+            verdicts = [bool(v) for v in verdicts]
+        self.verdicts.append([key, verdicts])
+        return verdicts
+
+
+def isolate(isolator, s, is_censored, budget, resume=None, executor=None,
+            **params):
+    """Isolate a censored keyword combination in s with isolator, answering
+    its tests with is_censored until it finishes or budget is exhausted.
+    :param isolator: coroutine isolator, e.g., coroutines.comp_aware_bin_split,
+    callback isolator, e.g., algorithms.comp_aware_bin_split, or function
+    returning an isolation.machines.Machine, e.g., coroutines.state_machine,
+    taking s and params
+    :param budget: Budget
+    :param resume: Partial from which to resume, which must have been returned
+    for the same s, isolator and params, or None
+    :param executor: concurrent.futures.Executor with which to send the probes
+    of a round concurrently, as in isolation.generators.drive()
+    :param params: keyword arguments of isolator, which must serialize to JSON
+    :return: censored keyword combination, or Partial if stopped, whose found
+    and remaining are those of the Machine if isolator returns one, and
+    otherwise None
+    """
+    key = Partial.key(isolator, s, params)
+    if resume is not None:
+        resume.check(key)
+    if resume is not None and resume.record is not None:
+        machine = Machine.loads(s, resume.record)
+    elif 'is_censored' in inspect.signature(isolator).parameters:
+        machine = None
+    else:
+        machine = isolator(s, **params)
+    metered = Metered(is_censored, budget,
+                      () if resume is None else resume.verdicts or (),
+                      executor)
+    try:
+        if machine is None:
+            return isolator(s, metered, **params)
+        if isinstance(machine, Machine):
+            return drive(machine.steps(), metered)
+        return drive(machine, metered)
+    except Exhausted:
+        if not isinstance(machine, Machine):
+            return Partial(key, metered.verdicts)
+        return Partial(key, record=machine.dumps(),
+                       found=list(machine.result()),
+                       remaining=tuple(machine.state['s']))
+
+
+def main():
+    import argparse
+    import importlib
+    import corpus
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Isolate keyword combinations within a query budget per '
+                    'session, resuming stopped isolations in the next '
+                    'session.')
+    parser.add_argument('--variant', default='coroutines')
+    parser.add_argument('--isolator', default='comp_aware_bin_split_2')
+    parser.add_argument('--machine', action='store_true',
+                        help='run the isolator as an isolation.machines.'
+                             'Machine, resuming from its state rather than '
+                             'by replaying verdicts')
+    parser.add_argument('--queries', type=int, default=10,
+                        help='queries allowed per session')
+    parser.add_argument('--articles', type=int, default=100)
+    parser.add_argument('--length', type=int, default=1000)
+    args = parser.parse_args()
+    module = importlib.import_module(args.variant)
+    isolator, params = getattr(module, args.isolator), {}
+    if args.machine:
+        if args.isolator not in ('comp_aware_bin_split',
+                                 'comp_aware_bin_split_2') or \
+                not hasattr(module, 'state_machine'):
+            parser.error('--machine runs comp_aware_bin_split or '
+                         'comp_aware_bin_split_2 of a coroutines variant')
+        isolator = module.state_machine
+        params['gallop'] = args.isolator == 'comp_aware_bin_split_2'
+    articles, keywords = corpus.generate(args.articles, 1000,
+                                         length=args.length)
+    sim = Simulator(articles, set(keywords) if module.ORDERED else
+                    {frozenset(kw) for kw in keywords})
+    sessions = correct = 0
+    for art in sim.get_articles():
+        saved = None
+        while True:
+            sessions += 1
+            resume = None if saved is None else Partial.loads(saved)
+            kw = isolate(isolator, art, sim.send_probe, Budget(args.queries),
+                         resume, **params)
+            if not isinstance(kw, Partial):
+                break
+            saved = kw.dumps()
+        found = sim.kws_in_this_article()
+        correct += set(kw) in found or tuple(kw) in found
+    n = sim.this_article + 1
+    print('%.2f queries and %.2f sessions of %d queries per article, '
+          '%.1f%% correct' % (sim.queries / n, sessions / n, args.queries,
+                              100 * correct / n))
+
+if __name__ == "__main__":
+    main()
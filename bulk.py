@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+from itertools import islice
+
+import numpy as np
+
+from matcher import KeywordMatcher
+
+
+class BulkSimulator:
+    """
+    Simulator for offline research which scores many probes over the current
+    article at once.  The occurrences in each article of the components of
+    the keyword combinations are found once, when the article is read, after
+    which a batch of probes, given as spans.Probe objects over the article, is
+    scored with NumPy interval checks of those occurrences against the spans
+    of every probe, rather than by joining and scanning each message.  Unlike
+    simulator.Simulator, it neither limits nor normalizes messages and its
+    verdicts are never wrong.
+    Usage:
+        bulk = BulkSimulator(articles, keywords) - as simulator.Simulator
+        for art in bulk.get_articles() - iterate over articles
+        verdicts = bulk.evaluate(probes) - NumPy array of verdicts
+        kw = generators.drive(isolator, bulk) - answer an isolator's tests,
+        lists of which are scored by batch()
+    """
+    def __init__(self, articles, keywords, separator='\x00'):
+        """
+        :param articles: list of articles to test, or an iterable from which
+        to read them each time get_articles() is called
+        :param keywords: iterable of sensitive keyword combinations, as
+        frozensets, or as tuples if their components must appear in order
+        :param separator: string with which the strings of a probe are joined,
+        which no component may contain
+        """
+        self.articles = articles
+        self.matcher = KeywordMatcher(keywords)
+        self.keywords = self.matcher.keywords
+        self.separator = separator
+        self.article = None
+        self.this_article = -1
+        self.index = None
+        self.queries = 0
+        self.query_log = {}
+
+    def get_articles(self):
+        """Return text of next article, indexing it"""
+        for article in islice(self.articles, self.this_article + 1, None):
+            self.this_article += 1
+            self.article = article
+            self.index = self.index_article(article)
+            self.query_log[self.this_article] = 0
+            yield article
+
+    def index_article(self, text):
+        """Return the index of text from KeywordMatcher.index(), with the
+        start indices of the occurrences of each component as NumPy arrays.
+        """
+        occ, unordered, ordered = self.matcher.index(text)
+        occ = {p: np.array(starts) for p, starts in occ.items()}
+        return occ, unordered, ordered
+
+    def evaluate(self, probes, index=None):
+        """Return a NumPy array of whether each of probes would be censored.
+        :param probes: list of spans.Probe objects over the article
+        :param index: index of the article as from index_article(), by
+        default that of the current article
+        """
+        occ, unordered, ordered = self.index if index is None else index
+        censored = np.zeros(len(probes), dtype=bool)
+        if self.matcher.always:
+            return ~censored
+        if not probes or not (unordered or ordered):
+            return censored
+        spans = [[(span.start, span.end) for span in probe.spans]
+                 for probe in probes]
+        bounds = np.zeros((len(probes), max(map(len, spans)), 2),
+                          dtype=np.int64)
+        for n, s in enumerate(spans):
+            if s:
+                bounds[n, :len(s)] = s
+        # (probe, span, 1) arrays, broadcast against occurrences
+        start, end = bounds[:, :, :1], bounds[:, :, 1:]
+        lengths = self.matcher.lengths
+        inside = {}
+        def within(p):
+            """Return whether each occurrence of component p lies within each
+            span of each probe, as a (probe, span, occurrence) array.
+            """
+            if p not in inside:
+                inside[p] = (occ[p] >= start) & (occ[p] + lengths[p] <= end)
+            return inside[p]
+        for ids in unordered:
+            present = np.ones(len(probes), dtype=bool)
+            for p in ids:
+                present &= within(p).any(axis=(1, 2))
+            censored |= present
+        if ordered:
+            # offset in the joined message of the start of each span
+            sizes = end[:, :, 0] - start[:, :, 0] + len(self.separator)
+            offset = (np.cumsum(sizes, axis=1) - sizes)[:, :, None]
+            never = np.iinfo(np.int64).max
+        for ids in ordered:
+            # end in the message of the components matched so far
+            pos = np.zeros((len(probes), 1, 1), dtype=np.int64)
+            for p in ids:
+                if p is None:
+                    continue
+                at = offset + occ[p] - start
+                at = np.where(within(p) & (at >= pos), at, never)
+                pos = at.min(axis=(1, 2), keepdims=True)
+                pos = np.where(pos == never, never, pos + lengths[p])
+            censored |= pos[:, 0, 0] != never
+        return censored
+
+    def __call__(self, test):
+        return self.batch([test])[0]
+
+    def batch(self, tests):
+        """Return whether each of tests is censored, counting each as a
+        query of the current article.
+        """
+        self.queries += len(tests)
+        self.query_log[self.this_article] += len(tests)
+        return [bool(v) for v in self.evaluate(tests)]
+
+
+def main():
+    import argparse
+    import random
+    import time
+    import corpus
+    from spans import Probe, Span
+    parser = argparse.ArgumentParser(
+        description='Score random probes over a synthetic corpus one message '
+                    'at a time and in NumPy batches, checking that both '
+                    'agree.')
+    parser.add_argument('--articles', type=int, default=20)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--probes', type=int, default=5000,
+                        help='number of probes per article')
+    parser.add_argument('--spans', type=int, default=3,
+                        help='maximum number of spans per probe')
+    parser.add_argument('--ordered', action='store_true')
+    args = parser.parse_args()
+    articles, keywords = corpus.generate(args.articles, args.keywords,
+                                         length=args.length)
+    if not args.ordered:
+        keywords = [frozenset(kw) for kw in keywords]
+    bulk = BulkSimulator(articles, keywords)
+    rng = random.Random(0)
+    scan_time = bulk_time = 0.0
+    censored = 0
+    for art in bulk.get_articles():
+        s = Span(art)
+        probes = []
+        for _ in range(args.probes):
+            spans = []
+            for _ in range(rng.randint(1, args.spans)):
+                i, j = sorted(rng.randrange(len(art) + 1) for _ in range(2))
+                spans.append(s[i:j])
+            probes.append(Probe(tuple(spans) if args.ordered else set(spans)))
+        start = time.perf_counter()
+        scanned = [bulk.matcher.is_censored(bulk.separator.join(probe))
+                   for probe in probes]
+        scan_time += time.perf_counter() - start
+        start = time.perf_counter()
+        verdicts = bulk.evaluate(probes)
+        bulk_time += time.perf_counter() - start
+        assert scanned == verdicts.tolist()
+        censored += sum(scanned)
+    n = args.articles * args.probes
+    print('%d probes, %.1f%% censored: %.2f us per probe scanning, '
+          '%.2f us per probe in batches' %
+          (n, 100 * censored / n, 1e6 * scan_time / n, 1e6 * bulk_time / n))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import os
+
+from isolation import drive
+from isolation.machines import Machine
+
+
+class CheckpointStore:
+    """
+    Directory of checkpoints of isolation.machines.Machine isolations, one
+    file per key, e.g., per article, each rewritten atomically so that a
+    worker which crashes mid-write leaves the previous checkpoint intact.
+    Usage:
+        store = CheckpointStore('checkpoints') - use or create directory
+        store.save(key, machine) - checkpoint machine, e.g., after a verdict
+        machine = store.load(key, text) - resume, or None if no checkpoint
+        store.discard(key) - remove a finished isolation's checkpoint
+    """
+    def __init__(self, directory):
+        """
+        :param directory: directory in which to keep checkpoints, created if
+        it does not exist
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        """Return the file holding the checkpoint for key"""
+        return os.path.join(self.directory, '%s.json' % key)
+
+    def save(self, key, machine):
+        """Write the state of machine as the checkpoint for key"""
+        path = self.path(key)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(machine.dumps())
+        os.replace(path + '.tmp', path)
+
+    def load(self, key, text):
+        """Return the machine over text checkpointed for key, or None"""
+        try:
+            with open(self.path(key), encoding='utf-8') as f:
+                return Machine.loads(text, f.read())
+        except FileNotFoundError:
+            return None
+
+    def discard(self, key):
+        """Remove the checkpoint for key, if any"""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+def same_probes(machine, isolator, is_censored):
+    """Return whether machine, serialized and resumed after every verdict,
+    sends the same probes as coroutine isolator over the same text and
+    isolates the same combination, answering both with is_censored.
+    """
+    sent = []
+    def answer(test):
+        tests = test if isinstance(test, list) else [test]
+        sent.extend(probe.key() for probe in tests)
+        verdicts = [is_censored(probe) for probe in tests]
+        return verdicts if isinstance(test, list) else verdicts[0]
+    kw = drive(isolator, answer)
+    expected, sent = sent, []
+    while not machine.done:
+        machine = Machine.loads(machine.text, machine.dumps())
+        machine.advance(answer(machine.test))
+    return sent == expected and machine.result() == kw
+
+
+class Crash(Exception):
+    """Simulated failure of a worker"""
+
+
+def main():
+    import argparse
+    import importlib
+    import random
+    import tempfile
+    import corpus
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Isolate keyword combinations with workers which crash '
+                    'at random, each new worker resuming from the '
+                    'checkpoint of the last verdict.')
+    parser.add_argument('--variant', default='coroutines')
+    parser.add_argument('--gallop', action='store_true',
+                        help='run comp_aware_bin_split_2 rather than '
+                             'comp_aware_bin_split')
+    parser.add_argument('--crash', type=float, default=0.05,
+                        help='probability that a worker crashes after a '
+                             'verdict')
+    parser.add_argument('--articles', type=int, default=100)
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--directory',
+                        help='checkpoint directory, by default a temporary '
+                             'one')
+    args = parser.parse_args()
+    module = importlib.import_module(args.variant)
+    articles, keywords = corpus.generate(args.articles, 1000,
+                                         length=args.length)
+    sim = Simulator(articles, set(keywords) if module.ORDERED else
+                    {frozenset(kw) for kw in keywords})
+    store = CheckpointStore(args.directory or tempfile.mkdtemp())
+    rng = random.Random(0)
+    def checkpoint(machine):
+        store.save(sim.this_article, machine)
+        if rng.random() < args.crash:
+            raise Crash()
+    crashes = correct = 0
+    for art in sim.get_articles():
+        # the machine sends exactly the probes of the coroutine
+        is_censored = lambda test: sim.matcher.is_censored('\x00'.join(test))
+        for fanout in (2, 3, 5):
+            assert same_probes(module.state_machine(art, fanout),
+                               module.comp_aware_bin_split(art, fanout),
+                               is_censored)
+            assert same_probes(module.state_machine(art, fanout, True),
+                               module.comp_aware_bin_split_2(art, fanout),
+                               is_censored)
+        while True:
+            # a new worker picks up the article from its checkpoint
+            machine = store.load(sim.this_article, art) or \
+                module.state_machine(art, gallop=args.gallop)
+            try:
+                kw = drive(machine.steps(checkpoint), sim.send_probe)
+                break
+            except Crash:
+                crashes += 1
+        store.discard(sim.this_article)
+        found = sim.kws_in_this_article()
+        correct += set(kw) in found or tuple(kw) in found
+    n = sim.this_article + 1
+    print('%.2f queries per article, %d crashes, %.1f%% correct' %
+          (sim.queries / n, crashes, 100 * correct / n))
+
+if __name__ == "__main__":
+    main()
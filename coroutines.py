@@ -1,94 +1,51 @@
 #!/usr/bin/env python3
 
-def bin_search(S, g):
-    lo, hi = 0, len(g)
-    while hi - lo > 1:
-        mid = (lo + hi) // 2
-        was_censored = yield S.union({g[mid:]})
-        if was_censored:
-            lo = mid
-        else:
-            hi = mid
-    return lo
+from isolation import generators, machines
 
-def bisect_right(S, g, before):
-    lo, hi = 0, len(g)
-    while hi - lo > 1:
-        mid = (lo + hi) // 2
-        was_censored = yield S.union({before + g[:mid]})
-        if not was_censored:
-            lo = mid
-        else:
-            hi = mid
-    return lo
+# components in any order, searching rightward
+ORDERED = False
+LEFT = False
 
-def comp_aware_bin_split(s):
-    C = set()
-    j = 0
-    while True:
-        i = yield from bin_search(C, s)
-        j = max(i + 1, j)
-        k = len(s)
-        while j < k:
-            was_censored = yield C.union({s[i:j], s[i+1:]})
-            if was_censored:
-                k = j
-            else:
-                j = j + 1
-        C = C.union({s[i:j]})
-        if j != len(s):
-            s = s[i+1:]
-        else:
-            s = ''
-        if not s:
-            break
-        was_censored = yield C
-        if was_censored:
-            break
-        j -= i
-    return C
+def comp_aware_bin_split(s, fanout=2):
+    """See isolation.generators.comp_aware_bin_split"""
+    return generators.comp_aware_bin_split(s, ORDERED, LEFT, fanout)
 
-def comp_aware_bin_split_2(s):
-    C = set()
-    j = 0
-    while True:
-        i = yield from bin_search(C, s)
-        diff = 1
-        j = max(i + 1, j)
-        k = len(s)
-        while j < k:
-            was_censored = yield C.union({s[i:j], s[i+1:]})
-            if was_censored:
-                break
-            else:
-                j += diff
-                diff *= 2
-        diff //= 2
-        s_1, j = s[i:], j - i
-        j = i + 1 + (yield from bisect_right(C.union({s_1[1:]}),
-                                             s_1[j-diff:j],
-                                             s_1[:j-diff]))
-        C = C.union({s[i:j+diff]})
-        if j + diff != len(s):
-            s = s[i+1:]
-        else:
-            s = ""
-        if not s:
-            break
-        was_censored = yield C
-        if was_censored:
-            break
-        j -= i
-    return C
+def comp_aware_bin_split_2(s, fanout=2, speculator=None):
+    """See isolation.generators.comp_aware_bin_split_2"""
+    return generators.comp_aware_bin_split_2(s, ORDERED, LEFT, fanout,
+                                             speculator)
 
-def isolate(isolator, sim):
-    was_censored = None
-    while True:
-        try:
-            test = isolator.send(was_censored)
-        except StopIteration as e:
-            return e.value
-        was_censored = is_censored(test, sim)
+def adaptive_bin_split(s, fanout=2, model=None):
+    """See isolation.generators.adaptive_bin_split"""
+    return generators.adaptive_bin_split(s, ORDERED, LEFT, fanout, model)
+
+def state_machine(s, fanout=2, gallop=False):
+    """See isolation.machines.Machine"""
+    return machines.Machine(s, ORDERED, LEFT, fanout, gallop)
+
+def isolate_all(s, isolator=comp_aware_bin_split, fanout=2, separator='\x00',
+                share=True):
+    """See isolation.generators.isolate_all"""
+    return generators.isolate_all(s, isolator, ORDERED, LEFT, fanout,
+                                  separator, share)
+
+def known_first(s, known, isolator=comp_aware_bin_split, fanout=2,
+                max_probes=4):
+    """See isolation.generators.known_first"""
+    return generators.known_first(s, known, isolator, ORDERED, LEFT, fanout,
+                                  max_probes)
+
+def isolate(isolator, sim, oracle=None, executor=None):
+    """Drive isolator to completion, answering each test it yields with
+    oracle, e.g., an oracle.CachedOracle, or by sending the test to sim if no
+    oracle is given.  Lists of tests yielded by isolators with a fanout above
+    2 are answered with a list of verdicts, by the oracle's batch() method if
+    it has one (see oracle.BatchOracle), or else concurrently if an executor
+    is given.
+    """
+    if oracle is None:
+        oracle = lambda test: is_censored(test, sim)
+    return generators.drive(isolator, oracle, executor)
 
 def is_censored(test, sim):
     separator = '\x00' # will be platform specific
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import json
+import mmap
+import os
+import random
+from array import array
+
+ALPHABETS = {
+    'cjk': [chr(c) for c in range(0x4e00, 0x4e00 + 3000)],
+    'latin': [chr(c) for c in range(ord('a'), ord('z') + 1)],
+}
+
+
+def generate_keywords(rng, n_keywords, arity=2, min_length=2, max_length=4,
+                      alphabet=ALPHABETS['cjk'], overlap=0.0):
+    """Return a list of n_keywords random keyword combinations as tuples of
+    components, in the order in which they are planted.
+    :param rng: random.Random
+    :param arity: number of components of each combination, or a (min, max)
+    pair from which to pick it
+    :param min_length: minimum number of characters of each component
+    :param max_length: maximum number of characters of each component
+    :param overlap: probability that a component starts with the last
+    character of the previous component, so that they can be planted
+    overlapping
+    """
+    lo, hi = arity if isinstance(arity, tuple) else (arity, arity)
+    keywords, seen = [], set()
+    while len(keywords) < n_keywords:
+        kw = []
+        for _ in range(rng.randint(lo, hi)):
+            k = ''.join(rng.choices(alphabet,
+                                    k=rng.randint(min_length, max_length)))
+            if kw and rng.random() < overlap:
+                k = kw[-1][-1] + k[1:]
+            kw.append(k)
+        kw = tuple(kw)
+        if kw not in seen and len(set(kw)) == len(kw):
+            seen.add(kw)
+            keywords.append(kw)
+    return keywords
+
+def generate_articles(rng, keywords, n_articles, length=1000, per_article=1,
+                      alphabet=ALPHABETS['cjk'], adjacent=0.0):
+    """Yield n_articles (text, planted) pairs, where text consists of length
+    random characters into which the components of the keyword combinations
+    in planted are inserted, in order.
+    :param rng: random.Random
+    :param keywords: list of keyword combinations as from generate_keywords()
+    :param per_article: number of combinations to plant in each article, or a
+    (min, max) pair from which to pick it
+    :param adjacent: probability that a component is planted immediately
+    after the previous component of its combination, overlapping it if it
+    starts with the same character as the previous one ends, in which case
+    the combination is only present when order is ignored
+    """
+    lo, hi = per_article if isinstance(per_article, tuple) else \
+        (per_article, per_article)
+    for _ in range(n_articles):
+        text = ''.join(rng.choices(alphabet, k=length))
+        planted = rng.sample(keywords, rng.randint(lo, hi))
+        # insert[p] is the list of strings to insert before text[p]
+        insert = {}
+        for kw in planted:
+            positions = sorted(rng.randint(0, length) for _ in kw)
+            for n, k in enumerate(kw):
+                if n and rng.random() < adjacent:
+                    positions[n] = positions[n - 1]
+                    strings = insert[positions[n]]
+                    if strings[-1] and strings[-1][-1] == k[0]:
+                        k = k[1:]
+                    strings.append(k)
+                else:
+                    insert.setdefault(positions[n], []).append(k)
+        pieces, last = [], 0
+        for p in sorted(insert):
+            pieces.append(text[last:p])
+            pieces.extend(insert[p])
+            last = p
+        pieces.append(text[last:])
+        yield ''.join(pieces), planted
+
+def open_file(path, mode='r'):
+    """Open a text file, gzip-compressed if path ends with .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def write_keywords(path, keywords):
+    """Write keyword combinations to path, one JSON list per line"""
+    with open_file(path, 'w') as f:
+        for kw in keywords:
+            f.write(json.dumps(list(kw), ensure_ascii=False) + '\n')
+
+def write_articles(path, articles):
+    """Write (text, planted) pairs to path, one JSON object per line, as they
+    are generated.
+    :return: number of articles written
+    """
+    n = 0
+    with open_file(path, 'w') as f:
+        for text, planted in articles:
+            f.write(json.dumps({'text': text,
+                                'planted': [list(kw) for kw in planted]},
+                               ensure_ascii=False) + '\n')
+            n += 1
+    return n
+
+def iter_keywords(path, ordered=False):
+    """Yield the keyword combinations in path one at a time, as tuples if
+    ordered and as frozensets otherwise.
+    """
+    convert = tuple if ordered else frozenset
+    with open_file(path) as f:
+        for line in f:
+            if line.strip():
+                yield convert(json.loads(line))
+
+def read_keywords(path, ordered=False):
+    """Return the set of keyword combinations in path, as tuples if ordered
+    and as frozensets otherwise.
+    """
+    return set(iter_keywords(path, ordered))
+
+def read_articles(path, memory_map=False):
+    """Return the articles in path as an ArticleFile"""
+    return ArticleFile(path, memory_map)
+
+
+class ArticleFile:
+    """
+    Articles stored one per line in a file and read lazily, each time the
+    file is iterated, rather than loaded into memory.  Lines of .jsonl files,
+    optionally gzip-compressed, are JSON objects with a "text" field, as
+    written by write_articles(), or JSON strings, whereas lines of other files
+    are the articles themselves.
+    Usage:
+        articles = ArticleFile(path) - open file of articles
+        articles = ArticleFile(path, memory_map=True) - read uncompressed
+                                                        file through mmap
+        for text in articles - read articles in order
+        articles[n], len(articles) - index the line offsets on first use
+    """
+    def __init__(self, path, memory_map=False):
+        self.path = path
+        self.memory_map = memory_map and not path.endswith('.gz')
+        self.json = '.jsonl' in os.path.basename(path)
+        self.offsets = None
+
+    def open(self):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+
+    def lines(self):
+        """Yield (offset, line) for every non-empty line of the file"""
+        with self.open() as f:
+            if self.memory_map and os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    yield from self.read_lines(m)
+            else:
+                yield from self.read_lines(f)
+
+    @staticmethod
+    def read_lines(f):
+        """Yield (offset, line) for every non-empty line read from f"""
+        offset = 0
+        for line in iter(f.readline, b''):
+            if line.strip():
+                yield offset, line
+            offset += len(line)
+
+    def parse(self, line):
+        """Return the text of the article on line"""
+        line = line.decode('utf-8')
+        if not self.json:
+            return line.rstrip('\r\n')
+        article = json.loads(line)
+        return article['text'] if isinstance(article, dict) else article
+
+    def __iter__(self):
+        for _, line in self.lines():
+            yield self.parse(line)
+
+    def index(self):
+        """Return the offsets of the lines of the file, scanning it once"""
+        if self.offsets is None:
+            self.offsets = array('q', (offset for offset, _ in self.lines()))
+        return self.offsets
+
+    def __len__(self):
+        return len(self.index())
+
+    def __getitem__(self, n):
+        with self.open() as f:
+            f.seek(self.index()[n])
+            return self.parse(f.readline())
+
+
+def generate(n_articles, n_keywords, arity=2, length=1000, per_article=1,
+             min_length=2, max_length=4, alphabet='cjk', overlap=0.0,
+             adjacent=0.0, seed=0):
+    """Return a list of articles and a list of keyword combinations (as
+    tuples) generated in memory, reproducibly for a given seed.
+    """
+    rng = random.Random(seed)
+    keywords = generate_keywords(rng, n_keywords, arity, min_length,
+                                 max_length, ALPHABETS[alphabet], overlap)
+    articles = [text for text, _ in
+                generate_articles(rng, keywords, n_articles, length,
+                                  per_article, ALPHABETS[alphabet], adjacent)]
+    return articles, keywords
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a reproducible synthetic corpus of articles '
+                    'with planted keyword combinations.')
+    parser.add_argument('output', help='directory to write articles.jsonl.gz '
+                                       'and keywords.jsonl.gz to')
+    parser.add_argument('--articles', type=int, default=1000)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--arity', type=int, nargs=2, default=(1, 3),
+                        metavar=('MIN', 'MAX'))
+    parser.add_argument('--component-length', type=int, nargs=2,
+                        default=(2, 4), metavar=('MIN', 'MAX'))
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--per-article', type=int, nargs=2, default=(1, 1),
+                        metavar=('MIN', 'MAX'))
+    parser.add_argument('--alphabet', choices=sorted(ALPHABETS),
+                        default='cjk')
+    parser.add_argument('--overlap', type=float, default=0.0)
+    parser.add_argument('--adjacent', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    alphabet = ALPHABETS[args.alphabet]
+    keywords = generate_keywords(rng, args.keywords, tuple(args.arity),
+                                 *args.component_length, alphabet,
+                                 args.overlap)
+    os.makedirs(args.output, exist_ok=True)
+    write_keywords(os.path.join(args.output, 'keywords.jsonl.gz'), keywords)
+    n = write_articles(os.path.join(args.output, 'articles.jsonl.gz'),
+                       generate_articles(rng, keywords, args.articles,
+                                         args.length, tuple(args.per_article),
+                                         alphabet, args.adjacent))
+    print('Wrote %d articles and %d keywords to %s' %
+          (n, len(keywords), args.output))
+
+if __name__ == "__main__":
+    main()
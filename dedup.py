@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import hashlib
+from functools import partial
+
+from isolation import callbacks
+from isolation.generators import locate
+from oracle import CachedOracle
+from spans import Span
+from store import KeywordStore
+
+
+def fingerprint(text):
+    """Return a digest identifying text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class SharedIsolation:
+    """
+    Share the work of isolating keyword combinations across the articles of a
+    corpus which repeat each other's text, as reposts and quotations do.  An
+    article identical to an earlier one, by fingerprint, gets the earlier
+    article's combination without any query.  Otherwise the combinations
+    isolated in earlier articles which are present in the article are probed
+    first, as by known_first(), and verdicts are cached across articles so
+    that identical tests are not sent again.
+    Usage:
+        shared = SharedIsolation(is_censored) - share work over is_censored
+        kw = shared.isolate(art) - isolate a combination in art
+        shared.saved() - number of queries saved
+        shared.duplicates - articles answered by an earlier article's
+        fingerprint
+        shared.known_hits - other articles whose combination was isolated in
+        an earlier article
+    """
+    def __init__(self, is_censored, isolator=None, ordered=False, left=False,
+                 maxsize=None, max_probes=4):
+        """
+        :param is_censored: callback returning whether a collection of strings
+        is censored
+        :param isolator: callback isolator taking s and is_censored, by default
+        comp_aware_bin_split with the given ordering and direction
+        :param maxsize: maximum number of cached verdicts, or None for no limit
+        :param max_probes: maximum number of earlier combinations to probe
+        """
+        if isolator is None:
+            isolator = partial(callbacks.comp_aware_bin_split,
+                               ordered=ordered, left=left)
+        self.isolator = isolator
+        self.ordered = ordered
+        self.left = left
+        self.max_probes = max_probes
+        self.oracle = CachedOracle(self.count(is_censored), ordered, maxsize)
+        self.store = KeywordStore(ordered)
+        # combinations found since the store's matcher was last built
+        self.recent = []
+        self.known = self.store.matcher()
+        # fingerprint -> (combination, queries spent isolating it)
+        self.results = {}
+        self.queries = 0
+        self.duplicates = 0
+        self.duplicate_queries = 0
+        self.known_hits = 0
+
+    def count(self, is_censored):
+        """Wrap is_censored to count the queries sent"""
+        def counted(test):
+            self.queries += 1
+            return is_censored(test)
+        return counted
+
+    def matches(self, text):
+        """Return the combinations isolated so far which are present in text,
+        most found first.  The store's matcher is rebuilt only once enough
+        combinations have been found since it was built, the rest being
+        located one by one.
+        """
+        if len(self.recent) > max(16, len(self.store) // 8):
+            self.known = self.store.matcher()
+            self.recent = []
+        s = Span(text)
+        return self.known.matches(text) + [
+            kw for kw in self.recent
+            if locate(s, kw, self.ordered) is not None]
+
+    def isolate(self, s):
+        """Isolate a censored keyword combination in article s"""
+        key = fingerprint(s)
+        if key in self.results:
+            kw, queries = self.results[key]
+            self.duplicates += 1
+            self.duplicate_queries += queries
+            self.store.record(kw)
+            return kw
+        queries = self.queries
+        kw = callbacks.known_first(s, self.oracle, self, self.isolator,
+                                   self.ordered, self.left, self.max_probes)
+        if self.store.key(kw) in self.store:
+            self.known_hits += 1
+        else:
+            self.recent.append(self.store.key(kw))
+        self.store.record(kw)
+        self.results[key] = kw, self.queries - queries
+        return kw
+
+    def saved(self):
+        """Return the number of queries saved by answering duplicate articles
+        and repeated tests, not counting those saved by probing earlier
+        combinations first, which can only be estimated.
+        """
+        return self.duplicate_queries + self.oracle.hits
+
+
+def main():
+    import argparse
+    import random
+    import corpus
+    from matcher import KeywordMatcher
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Isolate keyword combinations in a corpus with reposted '
+                    'and quoted articles, with and without sharing work '
+                    'across articles.')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=300)
+    parser.add_argument('--reposts', type=float, default=0.3,
+                        help='fraction of articles which repeat an earlier '
+                             'one')
+    parser.add_argument('--quotes', type=float, default=0.3,
+                        help='fraction of articles which quote half of an '
+                             'earlier one')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    articles, keywords = corpus.generate(args.articles, args.keywords,
+                                         length=args.length, seed=args.seed)
+    rng = random.Random(args.seed)
+    matcher = KeywordMatcher(frozenset(kw) for kw in keywords)
+    for n in range(1, len(articles)):
+        earlier = articles[rng.randrange(n)]
+        r = rng.random()
+        if r < args.reposts:
+            articles[n] = earlier
+        elif r < args.reposts + args.quotes:
+            half = len(earlier) // 2
+            start = rng.randrange(len(earlier) - half + 1)
+            quoted = articles[n][:half] + earlier[start:start+half]
+            # keep only quotations which are still censored
+            if matcher.is_censored(quoted):
+                articles[n] = quoted
+    sim = Simulator(articles, matcher.keywords)
+    def is_censored(test):
+        separator = '\x00' # will be platform specific
+        return sim.send(separator.join(test))
+    shared = SharedIsolation(is_censored)
+    for share in (False, True):
+        sim.this_article = -1
+        sim.queries = 0
+        correct = 0
+        for art in sim.get_articles():
+            if share:
+                kw = shared.isolate(art)
+            else:
+                kw = callbacks.comp_aware_bin_split(art, is_censored)
+            correct += set(kw) in sim.kws_in_this_article()
+        print('%-10s %.2f queries per article, %.1f%% correct' %
+              ('shared' if share else 'unshared',
+               sim.queries / len(articles), 100 * correct / len(articles)))
+    print('%d duplicate articles, %d with earlier combinations, %d '
+          'queries saved by duplicates and cached verdicts' %
+          (shared.duplicates, shared.known_hits, shared.saved()))
+
+if __name__ == "__main__":
+    main()
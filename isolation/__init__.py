@@ -0,0 +1,17 @@
+"""
+Isolation algorithms, implemented once for every ordering semantics and
+direction and exposed through three interfaces:
+    isolation.callbacks - isolators calling an is_censored callback
+    isolation.generators - coroutine isolators yielding tests
+    isolation.machines - the isolators as serializable state machines
+Usage:
+    kw = callbacks.comp_aware_bin_split(s, is_censored, ordered=True)
+    kw = drive(generators.comp_aware_bin_split(s, left=True), is_censored)
+The top-level algorithms-*.py and coroutines-*.py scripts bind these to each
+of the four combinations of ordered and left.
+"""
+
+from . import callbacks, generators, machines
+from .generators import drive
+
+__all__ = ['callbacks', 'generators', 'machines', 'drive']
@@ -0,0 +1,122 @@
+"""
+Callback isolators, which call is_censored with each test to send, a
+spans.Probe, and are returned whether it was censored.  They run the
+coroutine isolators of isolation.generators, with the same ordered and left
+parameters, answering their tests with is_censored.
+"""
+
+from functools import partial
+
+from oracle import InferenceOracle
+from . import generators
+from .generators import drive
+
+
+def comp_aware_bin_split(s, is_censored, ordered=False, left=False, fanout=2,
+                         executor=None):
+    """Isolates a censored keyword combination.  If more than one censored
+    keyword combination is present, it isolates the one whose leftmost
+    component is rightmost in s, or if left, the one whose rightmost
+    component is leftmost.
+    :param fanout: number of parts into which each round of the binary
+    searches splits the remaining interval
+    :param executor: concurrent.futures.Executor with which to send the probes
+    of a round concurrently, or None to send them one after another, unless
+    is_censored has a batch() method (see oracle.BatchOracle) with which to
+    send them together
+    :return: censored keyword combination
+    """
+    return drive(generators.comp_aware_bin_split(s, ordered, left, fanout),
+                 is_censored, executor)
+
+def comp_aware_bin_split_2(s, is_censored, ordered=False, left=False,
+                           fanout=2, executor=None, speculator=None):
+    """Modified version of comp_aware_bin_split which uses a binary search
+    rather than linear search to identify ends of components.
+    :param speculator: speculation.Speculator with which to send, with each
+    probe of the search for the other end of a component, the probes following
+    either of its verdicts, or None; the search then splits the remaining
+    interval in two regardless of fanout
+    """
+    return drive(generators.comp_aware_bin_split_2(s, ordered, left, fanout,
+                                                   speculator),
+                 is_censored, executor)
+
+def isolate_all(s, is_censored, isolator=None, ordered=False, left=False,
+                separator='\x00', share=True):
+    """Isolates every censored keyword combination in s, except those which
+    contain another one and so can never be told apart from it.  After
+    isolating a combination, each of its components in turn is broken up in
+    s by a separator, as by generators.break_up(), and the result searched
+    in the same way, so a combination is only missed if, for every component
+    of each combination isolated before it, each of its occurrences spans the
+    middle of an occurrence of the component, or overlaps it if it is a
+    single character.  Verdicts are shared between the searches so that tests
+    implied by earlier ones are not sent again.
+    :param isolator: callback isolator taking s and is_censored, by default
+    comp_aware_bin_split with the given ordering and direction
+    :param separator: string with which is_censored joins tested strings
+    :param share: whether to share verdicts between the searches, rather than
+    searching each string from scratch
+    :return: list of censored keyword combinations
+    """
+    if isolator is None:
+        isolator = partial(comp_aware_bin_split, ordered=ordered, left=left)
+    whole = (lambda s: (s,)) if ordered else (lambda s: {s})
+    oracle = InferenceOracle(is_censored, ordered=ordered)
+    oracle.record(whole(s), True)
+    found = []
+    pending, seen = [s], set()
+    while pending:
+        s = pending.pop()
+        if s in seen:
+            continue
+        seen.add(s)
+        if found and not share:
+            oracle.reset()
+        if not oracle(whole(s)):
+            continue
+        C = isolator(s, oracle)
+        if C not in found:
+            found.append(C)
+        for c in C:
+            pending.append(generators.break_up(s, c, separator))
+    return found
+
+def known_first(s, is_censored, known, isolator=None, ordered=False,
+                left=False, max_probes=4, separator='\x00'):
+    """Isolates a censored keyword combination, first probing the known
+    combinations present in s, as does generators.known_first, and falling
+    back to isolator only if none of them is censored.  A known combination
+    which is censored but not minimal is narrowed down by isolator in the
+    strings of a censored test without one of its components.
+    :param known: matcher.KeywordMatcher over the known combinations, as
+    tuples if ordered or else as frozensets
+    :param isolator: callback isolator taking s and is_censored, by default
+    comp_aware_bin_split with the given ordering and direction
+    :param max_probes: maximum number of known combinations to probe
+    :param separator: string with which is_censored joins tested strings
+    :return: censored keyword combination
+    """
+    if isolator is None:
+        isolator = partial(comp_aware_bin_split, ordered=ordered, left=left)
+    found = drive(generators.verify_known(s, known, ordered, max_probes),
+                  is_censored)
+    if found is None:
+        return isolator(s, is_censored)
+    spans, minimal = found
+    if minimal:
+        return generators.result(spans, ordered)
+    return isolator(separator.join(map(str, spans)), is_censored)
+
+def adaptive_bin_split(s, is_censored, ordered=False, left=False, fanout=2,
+                       executor=None, model=None):
+    """Version of comp_aware_bin_split which switches from scanning to
+    galloping to find the other end of each component as does
+    generators.adaptive_bin_split.
+    :param model: adaptive.LengthModel of the lengths of components, to
+    which those of the isolated combination are added
+    """
+    return drive(generators.adaptive_bin_split(s, ordered, left, fanout,
+                                               model),
+                 is_censored, executor)
@@ -0,0 +1,407 @@
+"""
+Coroutine isolators, which yield each test to send and are sent back whether
+it was censored.  A test is a spans.Probe, or a list of Probes whose verdicts
+are sent back as a list.  Every isolator takes two parameters:
+    ordered - whether the order of components matters, in which case tests
+              and isolated combinations are tuples rather than sets
+    left - whether to isolate the combination whose rightmost component is
+           leftmost in the string, searching leftward, rather than the one
+           whose leftmost component is rightmost, searching rightward
+"""
+
+from functools import partial
+
+from oracle import InferenceOracle
+from spans import Probe, Span
+
+
+def join(C, spans, left=False):
+    """Return the collection of Spans C together with spans, placed after C,
+    or before it if left, when C is a tuple.
+    """
+    if isinstance(C, tuple):
+        return tuple(spans) + C if left else C + tuple(spans)
+    return set(spans).union(C) if left else C.union(spans)
+
+def split_points(lo, hi, fanout=2):
+    """Return the indices probed by a round of a binary search which splits
+    the interval from lo to hi into fanout parts.
+    """
+    return sorted({lo + (hi - lo) * n // fanout
+                   for n in range(1, fanout)} - {lo})
+
+def narrow(lo, hi, mids, verdicts, censored_high):
+    """Return the interval (lo, hi) left by the verdicts of the probes of a
+    round at the indices mids.
+    """
+    for mid, was_censored in zip(mids, verdicts):
+        if bool(was_censored) == censored_high:
+            return lo, mid
+        lo = mid
+    return lo, hi
+
+def search(S, g, phase, join_test, censored_high, fanout=2):
+    """Perform a binary search over the indices of g for the boundary
+    between those whose test is censored and those whose test is not.
+    :param S: collection of Spans to include with test messages
+    :param g: spans.Span
+    :param join_test: function taking S, g and an index and returning the
+    collection of Spans to test for that index
+    :param censored_high: whether the tests of high rather than low indices
+    are censored
+    :param fanout: number of parts into which each round of probes splits the
+    remaining interval, yielding fanout - 1 probes at once
+    :return: (lo, hi), the last index on the low side and the first on the
+    high side of the boundary
+    """
+    lo, hi = 0, len(g)
+    while hi - lo > 1:
+        mids = split_points(lo, hi, fanout)
+        tests = [Probe(join_test(S, g, mid), phase) for mid in mids]
+        if len(tests) == 1:
+            verdicts = [(yield tests[0])]
+        else:
+            verdicts = yield tests
+        lo, hi = narrow(lo, hi, mids, verdicts, censored_high)
+    return lo, hi
+
+def bin_search(S, g, left=False, fanout=2):
+    """Return the index of the leftmost character of the leftmost component
+    of the keyword combination whose leftmost component is rightmost in g,
+    or if left, of the rightmost character of the rightmost component of the
+    one whose rightmost component is leftmost.
+    """
+    if left:
+        lo, hi = yield from search(
+            S, g, 'bin_search', lambda S, g, mid: join(S, (g[:mid],), left),
+            True, fanout)
+        return hi
+    lo, hi = yield from search(
+        S, g, 'bin_search', lambda S, g, mid: join(S, (g[mid:],)),
+        False, fanout)
+    return lo
+
+def empty(ordered):
+    return () if ordered else set()
+
+def result(C, ordered):
+    if ordered:
+        return tuple(str(c) for c in C)
+    return {str(c) for c in C}
+
+def end_search(C, s, i, j, left=False, scan=None, fanout=2):
+    """Return the initial state and step function of the search for the end
+    of the component starting at s[i], given that it ends no earlier than j,
+    or if left, for the start of the component ending at s[i], given that it
+    starts no later than j.  Up to scan ends are tested one by one, as
+    comp_aware_bin_split does, and the rest found by galloping and then
+    bisecting the last step of the gallop, as comp_aware_bin_split_2 does.
+    A step function takes a state and returns None if the state is final, or
+    else (test, advance), where test is a Probe, or a list of Probes if a
+    round of the bisection sends several, and advance takes its verdict, or
+    list of verdicts, and returns the next state, as speculation.Speculator
+    expects.  States are lists [phase, j, n, lo, hi], where n is the number
+    of ends left to scan while scanning and the step of the gallop after,
+    and lo and hi bound the bisection; end_found() reads the end from a final
+    state.
+    :param scan: maximum number of ends to scan one by one, or None for all
+    :param fanout: number of parts into which each round of the bisection
+    splits the remaining interval
+    """
+    if left:
+        s_1 = s[:i]
+        def tested(j):
+            return join(C, (s[:i-1], s[j:i]), True)
+        def bisected(j, n):
+            return s_1[max(j, 0):j+n]
+        def bisect_test(j, n, mid):
+            return join(C, (s_1[:-1], bisected(j, n)[mid:] + s_1[j+n:]), True)
+        def within(j):
+            return j > 0
+        step_by = -1
+    else:
+        k = len(s)
+        s_1 = s[i:]
+        def tested(j):
+            return join(C, (s[i:j], s[i+1:]))
+        def bisected(j, n):
+            return s_1[j-i-n:j-i]
+        def bisect_test(j, n, mid):
+            return join(C, (s_1[:j-i-n] + bisected(j, n)[:mid], s_1[1:]))
+        def within(j):
+            return j < k
+        step_by = 1
+    phase = 'bisect_left' if left else 'bisect_right'
+    def scanning(j, n):
+        if within(j) and n != 0:
+            return ['scan', j, n, None, None]
+        return galloping(j, 1)
+    def galloping(j, n):
+        if within(j):
+            return ['gallop', j, n, None, None]
+        return bisecting(j, n)
+    def bisecting(j, n):
+        n //= 2
+        return [phase, j, n, 0, len(bisected(j, n))]
+    def step(state):
+        name, j, n, lo, hi = state
+        if name == 'scan':
+            return Probe(tested(j), 'scan'), lambda was_censored: (
+                [phase, j, 0, 0, 0] if was_censored else
+                scanning(j + step_by, None if n is None else n - 1))
+        if name == 'gallop':
+            return Probe(tested(j), 'gallop'), lambda was_censored: (
+                bisecting(j, n) if was_censored else
+                galloping(j + step_by * n, n * 2))
+        if hi - lo <= 1:
+            return None
+        mids = split_points(lo, hi, fanout)
+        tests = [Probe(bisect_test(j, n, mid), phase) for mid in mids]
+        def advance(verdicts):
+            if len(tests) == 1:
+                verdicts = [verdicts]
+            return [phase, j, n] + list(narrow(lo, hi, mids, verdicts,
+                                               not left))
+        return tests[0] if len(tests) == 1 else tests, advance
+    return scanning(j, scan), step
+
+def end_found(state, left=False):
+    """Return (end, j) from the final state of end_search(), where end is the
+    end, or if left, the start, of the component, and j the bound to pass to
+    end_search() for the next component.
+    """
+    _, j, n, lo, hi = state
+    if left:
+        start = max(j, 0) + lo
+        return start, start
+    end = j - n + hi
+    return end, end - n
+
+def follow(state, step):
+    """Coroutine running the chain of a step function from state, as
+    speculation.Speculator.search() does without speculating, and returning
+    the final state.
+    """
+    current = step(state)
+    while current:
+        test, advance = current
+        state = advance((yield test))
+        current = step(state)
+    return state
+
+def comp_aware_bin_split(s, ordered=False, left=False, fanout=2):
+    """Isolates a censored keyword combination.  If more than one censored
+    keyword combination is present, it isolates the one whose leftmost
+    component is rightmost in s, or if left, the one whose rightmost
+    component is leftmost.  This is adaptive_bin_split scanning every end of
+    each component one by one.
+    :param fanout: number of parts into which each round of the binary
+    searches splits the remaining interval
+    :return: censored keyword combination
+    """
+    return (yield from adaptive_bin_split(s, ordered, left, fanout,
+                                          scan=None))
+
+def comp_aware_bin_split_2(s, ordered=False, left=False, fanout=2,
+                           speculator=None):
+    """Modified version of comp_aware_bin_split which uses a binary search
+    rather than linear search to identify ends of components.  This is
+    adaptive_bin_split scanning no end of any component.
+    :param speculator: speculation.Speculator with which to send, with each
+    probe of the search for the other end of a component, the probes following
+    either of its verdicts, or None; the search then splits the remaining
+    interval in two regardless of fanout
+    """
+    return (yield from adaptive_bin_split(s, ordered, left, fanout,
+                                          speculator=speculator, scan=0))
+
+def adaptive_bin_split(s, ordered=False, left=False, fanout=2, model=None,
+                       speculator=None, scan=4):
+    """Version of comp_aware_bin_split which scans the ends of each
+    component one by one only as long as model expects that to take fewer
+    probes than galloping and bisecting as does comp_aware_bin_split_2, and
+    then switches to the latter.  The lengths of the components of the
+    isolated combination are added to model.
+    :param model: adaptive.LengthModel of the lengths of components, or None
+    to scan up to scan ends
+    :param speculator: speculation.Speculator with which to speculate on the
+    search for the other end of each component, as does
+    comp_aware_bin_split_2, or None
+    :param scan: number of ends to scan before galloping if no model is given,
+    or None to scan every end
+    :return: censored keyword combination
+    """
+    if model is not None:
+        scan = model.scan_limit()
+    s = Span(s)
+    C = empty(ordered)
+    j = len(s) if left else 0
+    while True:
+        i = yield from bin_search(C, s, left, fanout)
+        j = min(i - 1, j - 1) if left else max(i + 1, j)
+        state, step = end_search(C, s, i, j, left, scan,
+                                 2 if speculator else fanout)
+        if speculator:
+            state = yield from speculator.search(state, step)
+        else:
+            state = yield from follow(state, step)
+        end, j = end_found(state, left)
+        if left:
+            C = join(C, (s[end:i],), left)
+            s = s[:i-1] if end > 0 else s[:0]
+        else:
+            C = join(C, (s[i:end],))
+            s = s[i+1:] if end != len(s) else s[:0]
+            j -= i
+        if not s:
+            break
+        was_censored = yield Probe(C, 'check')
+        if was_censored:
+            break
+    C = result(C, ordered)
+    if model is not None:
+        model.observe(C)
+    return C
+
+def isolate_all(s, isolator=None, ordered=False, left=False, fanout=2,
+                separator='\x00', share=True):
+    """Isolates every censored keyword combination in s, as does
+    callbacks.isolate_all.
+    :param isolator: coroutine isolator taking s and fanout, by default
+    comp_aware_bin_split with the given ordering and direction
+    :param separator: string with which tested strings are joined
+    :param share: whether to share verdicts between the searches, rather than
+    searching each string from scratch
+    :return: list of censored keyword combinations
+    """
+    if isolator is None:
+        isolator = partial(comp_aware_bin_split, ordered=ordered, left=left)
+    whole = (lambda s: (s,)) if ordered else (lambda s: {s})
+    known = InferenceOracle(None, ordered=ordered)
+    known.record(whole(s), True)
+    found = []
+    pending, seen = [s], set()
+    while pending:
+        s = pending.pop()
+        if s in seen:
+            continue
+        seen.add(s)
+        if found and not share:
+            known.reset()
+        was_censored = known.infer(whole(s))
+        if was_censored is None:
+            was_censored = yield Probe(whole(Span(s)), 'whole')
+            known.record(whole(s), was_censored)
+        if not was_censored:
+            continue
+        C = yield from known.filter(isolator(s, fanout=fanout))
+        if C not in found:
+            found.append(C)
+        for c in C:
+            pending.append(break_up(s, c, separator))
+    return found
+
+def break_up(s, c, separator):
+    """Return s with separator inserted in the middle of every occurrence of
+    c, or in place of c if it is a single character, so that c no longer
+    occurs but strings overlapping either half of an occurrence still do.
+    """
+    if len(c) == 1:
+        return s.replace(c, separator)
+    broken = c[:len(c)//2] + separator + c[len(c)//2:]
+    while c in s:
+        s = s.replace(c, broken)
+    return s
+
+def locate(s, kw, ordered=False):
+    """Return the collection of Spans of s at the first occurrences of the
+    components of kw, each after the previous one if ordered, or None if they
+    do not all occur.
+    """
+    spans, pos = [], 0
+    for k in kw:
+        start = s.text.find(k, s.start + pos if ordered else s.start, s.end)
+        if start < 0:
+            return None
+        spans.append(Span(s.text, start, start + len(k)))
+        if ordered:
+            pos = start + len(k) - s.start
+    return tuple(spans) if ordered else set(spans)
+
+def verify_known(s, known, ordered=False, max_probes=4):
+    """Return the Spans of s at the first of the known keyword combinations
+    present in s which is censored by itself, or None if none of those probed
+    is.  The combination is then checked to be minimal, i.e., uncensored
+    without any one of its components; if it is not, the Spans of the first
+    censored test without a component are returned instead.
+    :param known: matcher.KeywordMatcher over the known combinations, as
+    tuples if ordered or else as frozensets, which are tried in the order
+    given to it
+    :param max_probes: maximum number of candidates to probe
+    :return: (Spans, minimal), where minimal is whether they are a minimal
+    censored combination, or None
+    """
+    s = Span(s)
+    for kw in known.matches(str(s))[:max_probes]:
+        spans = locate(s, kw, ordered)
+        if spans is None or not (yield Probe(spans, 'known')):
+            continue
+        if not ordered:
+            spans = tuple(sorted(spans, key=lambda span: span.start))
+        collection = tuple if ordered else set
+        for n in range(len(spans) if len(spans) > 1 else 0):
+            rest = collection(spans[:n] + spans[n+1:])
+            if (yield Probe(rest, 'known')):
+                return rest, False
+        return collection(spans), True
+    return None
+
+def known_first(s, known, isolator=None, ordered=False, left=False, fanout=2,
+                max_probes=4, separator='\x00'):
+    """Isolates a censored keyword combination, first probing the known
+    combinations present in s, as located by known, and falling back to
+    isolator only if none of them is censored.  A known combination which is
+    censored but not minimal is narrowed down by isolator in the strings of
+    a censored test without one of its components, joined with separator.
+    The combination returned may then not be the one which isolator would
+    have isolated in s.
+    :param known: matcher.KeywordMatcher over the known combinations, as
+    tuples if ordered or else as frozensets
+    :param isolator: coroutine isolator taking s and fanout, by default
+    comp_aware_bin_split with the given ordering and direction
+    :param max_probes: maximum number of known combinations to probe
+    :param separator: string contained in no component
+    :return: censored keyword combination
+    """
+    if isolator is None:
+        isolator = partial(comp_aware_bin_split, ordered=ordered, left=left)
+    found = yield from verify_known(s, known, ordered, max_probes)
+    if found is None:
+        return (yield from isolator(s, fanout=fanout))
+    spans, minimal = found
+    if minimal:
+        return result(spans, ordered)
+    joined = separator.join(map(str, spans))
+    return (yield from isolator(joined, fanout=fanout))
+
+def drive(isolator, is_censored, executor=None):
+    """Drive isolator to completion, answering each test it yields with
+    is_censored.  Lists of tests are answered with a list of verdicts, by
+    is_censored's batch() method if it has one (see oracle.BatchOracle), or
+    else concurrently if an executor is given.
+    :return: value returned by isolator
+    """
+    probe = map if executor is None else executor.map
+    batch = getattr(is_censored, 'batch', None)
+    was_censored = None
+    while True:
+        try:
+            test = isolator.send(was_censored)
+        except StopIteration as e:
+            return e.value
+        if isinstance(test, list) and batch:
+            was_censored = batch(test)
+        elif isinstance(test, list):
+            was_censored = list(probe(is_censored, test))
+        else:
+            was_censored = is_censored(test)
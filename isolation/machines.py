@@ -0,0 +1,203 @@
+"""
+State-machine isolators, which keep their whole state in a small record of
+integers rather than in the frames of a coroutine, so that an isolation can
+be checkpointed after every verdict and resumed in another process.  A
+Machine sends exactly the probes of comp_aware_bin_split, or of
+comp_aware_bin_split_2 without a speculator, from isolation.generators.
+"""
+
+import json
+
+from spans import Probe, Span
+from .generators import (end_found, end_search, join, narrow, result,
+                         split_points)
+
+
+class Machine:
+    """
+    comp_aware_bin_split, or comp_aware_bin_split_2 if gallop, as a state
+    machine over text.  The state is a dict holding the phase of the search,
+    the (start, end) positions in text of the string left to search, s, and
+    of the components found, C, the start i of the current component and the
+    bound j on its other end, the interval lo to hi of the binary search for
+    i, and the state of generators.end_search() for the other end, or None
+    where unused.
+    Usage:
+        machine = Machine(text, ordered, left, gallop=True) - start
+        while not machine.done:
+            machine.advance(is_censored(machine.test)) - answer the test, a
+                                                         list if several
+        kw = machine.result() - isolated combination
+        record = machine.dumps() - serialize, without text
+        machine = Machine.loads(text, record) - resume from record
+        kw = drive(machine.steps(), is_censored) - run as a coroutine
+    """
+    def __init__(self, text, ordered=False, left=False, fanout=2,
+                 gallop=False, state=None):
+        """
+        :param text: string in which to isolate a censored combination
+        :param fanout: number of parts into which each round of the binary
+        searches splits the remaining interval
+        :param gallop: whether to find the other end of each component by
+        galloping and bisecting, as comp_aware_bin_split_2 does, rather than
+        by a linear scan
+        :param state: state from which to resume, or None to start
+        """
+        self.text = text
+        self.ordered = ordered
+        self.left = left
+        self.fanout = fanout
+        self.gallop = gallop
+        if state is None:
+            self.state = {'phase': None, 's': [0, len(text)], 'C': [],
+                          'i': None, 'j': len(text) if left else 0,
+                          'lo': None, 'hi': None, 'end': None}
+            self.search(len(text))
+        else:
+            self.state = state
+        self.test = self.probes()
+
+    @property
+    def done(self):
+        return self.state['phase'] == 'done'
+
+    def span(self):
+        """Return the string left to search as a Span"""
+        return Span(self.text, *self.state['s'])
+
+    def components(self):
+        """Return the components found as a collection of Spans"""
+        spans = [Span(self.text, start, end)
+                 for start, end in self.state['C']]
+        return tuple(spans) if self.ordered else set(spans)
+
+    def result(self):
+        """Return the isolated combination, or the components found so far"""
+        return result(self.components(), self.ordered)
+
+    def end_step(self):
+        """Return the step function of the search for the other end of the
+        current component.
+        """
+        st = self.state
+        return end_search(self.components(), self.span(), st['i'], st['j'],
+                          self.left, 0 if self.gallop else None,
+                          self.fanout)[1]
+
+    def probes(self):
+        """Return the test to send next: a Probe, a list of Probes if a
+        round sends several, or None when done.
+        """
+        st = self.state
+        phase = st['phase']
+        if phase == 'done':
+            return None
+        s, C = self.span(), self.components()
+        if phase == 'check':
+            return Probe(C, 'check')
+        if phase == 'end':
+            return self.end_step()(st['end'])[0]
+        if self.left:
+            test = lambda mid: join(C, (s[:mid],), True)
+        else:
+            test = lambda mid: join(C, (s[mid:],))
+        tests = [Probe(test(mid), phase)
+                 for mid in split_points(st['lo'], st['hi'], self.fanout)]
+        return tests[0] if len(tests) == 1 else tests
+
+    def advance(self, was_censored):
+        """Advance the state by the verdict of the current test, a list of
+        verdicts if it is a list.
+        """
+        st = self.state
+        phase = st['phase']
+        if phase == 'bin_search':
+            verdicts = was_censored if isinstance(self.test, list) else \
+                [was_censored]
+            mids = split_points(st['lo'], st['hi'], self.fanout)
+            st['lo'], st['hi'] = narrow(st['lo'], st['hi'], mids, verdicts,
+                                        self.left)
+            if st['hi'] - st['lo'] <= 1:
+                self.searched()
+        elif phase == 'check':
+            if was_censored:
+                st['phase'] = 'done'
+            else:
+                self.search(st['s'][1] - st['s'][0])
+        else:
+            step = self.end_step()
+            self.follow(step, step(st['end'])[1](was_censored))
+        self.test = self.probes()
+
+    def search(self, n):
+        """Start the binary search for a component over n indices"""
+        st = self.state
+        st['phase'], st['lo'], st['hi'] = 'bin_search', 0, n
+        if n <= 1:
+            self.searched()
+
+    def searched(self):
+        """Start searching for the other end of the component found by the
+        binary search.
+        """
+        st = self.state
+        i = st['hi'] if self.left else st['lo']
+        st['lo'] = st['hi'] = None
+        st['i'] = i
+        if self.left:
+            st['j'] = min(i - 1, st['j'] - 1)
+        else:
+            st['j'] = max(i + 1, st['j'])
+        state, step = end_search(self.components(), self.span(), i, st['j'],
+                                 self.left, 0 if self.gallop else None,
+                                 self.fanout)
+        self.follow(step, state)
+
+    def follow(self, step, state):
+        """Continue the search for the other end from state, adding the
+        component once state is final.
+        """
+        st = self.state
+        if step(state) is not None:
+            st['phase'], st['end'] = 'end', state
+            return
+        end, j = end_found(state, self.left)
+        s, i = self.span(), st['i']
+        if self.left:
+            component = s[end:i]
+            st['C'].insert(0, [component.start, component.end])
+            s = s[:i-1] if end > 0 else s[:0]
+        else:
+            component = s[i:end]
+            st['C'].append([component.start, component.end])
+            s = s[i+1:] if end != len(s) else s[:0]
+            j -= i
+        st['s'] = [s.start, s.end]
+        st['i'], st['j'], st['end'] = None, j, None
+        st['phase'] = 'check' if s else 'done'
+
+    def dumps(self):
+        """Return the machine, without its text, as a JSON string"""
+        return json.dumps({'ordered': self.ordered, 'left': self.left,
+                           'fanout': self.fanout, 'gallop': self.gallop,
+                           'state': self.state})
+
+    @classmethod
+    def loads(cls, text, record):
+        """Return the machine over text serialized as record by dumps()"""
+        saved = json.loads(record)
+        return cls(text, saved['ordered'], saved['left'], saved['fanout'],
+                   saved['gallop'], saved['state'])
+
+    def steps(self, on_advance=None):
+        """Coroutine yielding each test and advancing by the verdicts sent
+        back, for isolation.generators.drive().
+        :param on_advance: called with the machine after every verdict, e.g.,
+        to checkpoint it
+        :return: isolated combination
+        """
+        while not self.done:
+            self.advance((yield self.test))
+            if on_advance is not None:
+                on_advance(self)
+        return self.result()
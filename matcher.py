@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+from bisect import bisect_left
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed collection of non-empty patterns which
+    finds every occurrence of every pattern in one pass over a text.
+    Usage:
+        ac = AhoCorasick(patterns) - builds the automaton
+        for end, p in ac.scan(text) - iterate over (end index, pattern id)
+        ac.patterns[p] - pattern with id p
+    """
+    def __init__(self, patterns):
+        self.patterns = sorted({p for p in patterns if p})
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for p, pattern in enumerate(self.patterns):
+            state = 0
+            for c in pattern:
+                nxt = self.goto[state].get(c)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][c] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (p,)
+        self.lengths = [len(p) for p in self.patterns]
+        # breadth-first so that fail links always point to shallower states
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(c, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def scan(self, text):
+        """Yield (end, pattern id) for every occurrence of a pattern in text,
+        in order of increasing end, where text[end - len(pattern):end] is the
+        occurrence.
+        """
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for end, c in enumerate(text, 1):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for p in out[state]:
+                yield end, p
+
+    def occurrences(self, text):
+        """Return a dict mapping each pattern id found in text to the sorted
+        list of start indices of its occurrences.
+        """
+        occ = {}
+        lengths = self.lengths
+        for end, p in self.scan(text):
+            occ.setdefault(p, []).append(end - lengths[p])
+        return occ
+
+
+class KeywordMatcher:
+    """
+    Decide which sensitive keyword combinations are present in a message by
+    running the components of every combination through one Aho-Corasick
+    automaton.  Combinations given as sets (e.g., frozenset) are present if all
+    of their components appear anywhere in the message, whereas combinations
+    given as tuples are present only if their components appear in the given
+    order without overlapping.
+    """
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.automaton = AhoCorasick(k for kw in self.keywords for k in kw)
+        ids = {k: p for p, k in enumerate(self.automaton.patterns)}
+        self.lengths = self.automaton.lengths
+        # combinations whose components are all empty are always present
+        self.always = []
+        # for unordered combinations, the set of component ids to find
+        self.needed = []
+        # for each component id, the unordered combinations using it
+        self.using = [[] for _ in self.automaton.patterns]
+        # ordered combinations and their component ids
+        self.ordered = []
+        # for each component id, the ordered combinations using it
+        self.ordered_using = [[] for _ in self.automaton.patterns]
+        for kw in self.keywords:
+            needed = {ids[k] for k in kw if k}
+            if not needed:
+                self.always.append(kw)
+            elif isinstance(kw, tuple):
+                for p in needed:
+                    self.ordered_using[p].append(len(self.ordered))
+                self.ordered.append((kw, [ids.get(k) for k in kw]))
+            else:
+                for p in needed:
+                    self.using[p].append(len(self.needed))
+                self.needed.append((kw, needed))
+
+    def matches(self, msg):
+        """Return the list of keyword combinations present in msg"""
+        occ = self.automaton.occurrences(msg)
+        found = list(self.always)
+        candidates = {n for p in occ for n in self.using[p]}
+        for n in sorted(candidates):
+            kw, needed = self.needed[n]
+            if all(p in occ for p in needed):
+                found.append(kw)
+        for kw, ids in self._ordered_candidates(occ):
+            if self._in_order(kw, ids, occ):
+                found.append(kw)
+        return found
+
+    def is_censored(self, msg):
+        """Return whether any keyword combination is present in msg, stopping
+        the scan as soon as an unordered combination is satisfied.
+        """
+        if self.always:
+            return True
+        needed = self.needed
+        remaining = {}
+        lengths = self.lengths
+        occ = {}
+        for end, p in self.automaton.scan(msg):
+            starts = occ.setdefault(p, [])
+            if not starts:
+                for n in self.using[p]:
+                    left = remaining.get(n, len(needed[n][1])) - 1
+                    if not left:
+                        return True
+                    remaining[n] = left
+            starts.append(end - lengths[p])
+        return any(self._in_order(kw, ids, occ)
+                   for kw, ids in self._ordered_candidates(occ))
+
+    def index(self, text):
+        """Return an index of the occurrences in text of the components of
+        the combinations which may be present in it, for spans_censored(), as
+        (occ, unordered, ordered), where occ maps each component id to the
+        sorted list of start indices of its occurrences, and unordered and
+        ordered list the component ids of the combinations all of whose
+        components occur, None standing for an empty component.
+        """
+        occ = self.automaton.occurrences(text)
+        candidates = {n for p in occ for n in self.using[p]}
+        unordered = [sorted(self.needed[n][1]) for n in sorted(candidates)
+                     if self.needed[n][1] <= occ.keys()]
+        ordered = [ids for _, ids in self._ordered_candidates(occ)]
+        return occ, unordered, ordered
+
+    def spans_censored(self, index, spans, separator_length=1):
+        """Return whether any keyword combination is present in the message
+        joining the substrings text[start:end], for the (start, end) pairs of
+        spans, with a separator of separator_length characters which no
+        component contains, given the index of text from index().  Each
+        component is looked up by bisection of its occurrences rather than by
+        scanning the message.
+        """
+        if self.always:
+            return True
+        occ, unordered, ordered = index
+        lengths = self.lengths
+        def first(p, lo, hi):
+            """Return the start of the first occurrence of component p within
+            text[lo:hi], or None.
+            """
+            starts = occ[p]
+            idx = bisect_left(starts, lo)
+            if idx < len(starts) and starts[idx] + lengths[p] <= hi:
+                return starts[idx]
+            return None
+        for ids in unordered:
+            if all(any(first(p, start, end) is not None
+                       for start, end in spans) for p in ids):
+                return True
+        if not ordered:
+            return False
+        # offset in the message of the start of each span
+        offsets, offset = [], 0
+        for start, end in spans:
+            offsets.append(offset)
+            offset += end - start + separator_length
+        for ids in ordered:
+            # end in the message of the components matched so far
+            pos = 0
+            for p in ids:
+                if p is None:
+                    continue
+                for (start, end), offset in zip(spans, offsets):
+                    found = first(p, start + max(pos - offset, 0), end)
+                    if found is not None:
+                        pos = offset + found - start + lengths[p]
+                        break
+                else:
+                    break
+            else:
+                return True
+        return False
+
+    def _ordered_candidates(self, occ):
+        """Return the ordered combinations all of whose components occur
+        according to occurrence lists occ.
+        """
+        candidates = {n for p in occ for n in self.ordered_using[p]}
+        return [self.ordered[n] for n in sorted(candidates)
+                if all(p is None or p in occ for p in self.ordered[n][1])]
+
+    def _in_order(self, kw, ids, occ):
+        """Greedily match the components of ordered combination kw against
+        occurrence lists occ, taking the earliest fitting occurrence of each.
+        """
+        pos = 0
+        for k, p in zip(kw, ids):
+            if p is None:
+                continue
+            starts = occ.get(p, ())
+            idx = bisect_left(starts, pos)
+            if idx == len(starts):
+                return False
+            pos = starts[idx] + len(k)
+        return True
+
+
+def naive_is_censored(keywords, msg):
+    """Reference implementation testing every component of every keyword
+    combination against msg with the 'in' operator, ignoring order.
+    """
+    for this_kw in keywords:
+        if all(k in msg for k in this_kw):
+            return True
+    return False
+
+def main():
+    import random
+    import time
+    rng = random.Random(0)
+    alphabet = [chr(c) for c in range(0x4e00, 0x4e00 + 3000)]
+    def word(lo, hi):
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randint(lo, hi)))
+    for n_keywords in (100, 1000, 10000, 50000):
+        keywords = {frozenset(word(2, 4) for _ in range(rng.randint(1, 3)))
+                    for _ in range(n_keywords)}
+        msgs = [word(50, 500) for _ in range(200)]
+        # plant a combination in half of the messages
+        for n, kw in zip(range(0, len(msgs), 2), keywords):
+            msgs[n] = ''.join(k + word(0, 50) for k in kw) + msgs[n]
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        fast = [matcher.is_censored(msg) for msg in msgs]
+        fast_time = time.perf_counter() - start
+        start = time.perf_counter()
+        slow = [naive_is_censored(keywords, msg) for msg in msgs]
+        slow_time = time.perf_counter() - start
+        assert fast == slow
+        print("%6d keywords: build %.3fs, automaton %9.1f probes/s, "
+              "loop %9.1f probes/s" %
+              (len(keywords), build, len(msgs) / fast_time,
+               len(msgs) / slow_time))
+    # probes of spans over a message, as sent by Simulator.send_probe(),
+    # answered from the message's index and by scanning the joined spans
+    for convert in (frozenset, tuple):
+        keywords = {convert(word(1, 3) for _ in range(rng.randint(1, 3)))
+                    for _ in range(1000)}
+        matcher = KeywordMatcher(keywords)
+        probes = censored = 0
+        index_time = scan_time = 0.0
+        for kw in list(keywords)[:200]:
+            msg = ''.join(k + word(0, 20) for k in kw) + word(50, 200)
+            index = matcher.index(msg)
+            for _ in range(200):
+                spans = []
+                for _ in range(rng.randint(1, 3)):
+                    i = rng.randint(0, len(msg))
+                    spans.append((i, rng.randint(i, len(msg))))
+                start = time.perf_counter()
+                indexed = matcher.spans_censored(index, spans)
+                index_time += time.perf_counter() - start
+                start = time.perf_counter()
+                scanned = matcher.is_censored(
+                    '\x00'.join(msg[i:j] for i, j in spans))
+                scan_time += time.perf_counter() - start
+                assert indexed == scanned, (kw, msg, spans)
+                probes += 1
+                censored += scanned
+        print("%s spans: %d probes, %.1f%% censored, index %9.1f probes/s, "
+              "scan %9.1f probes/s" %
+              ('ordered' if convert is tuple else 'unordered', probes,
+               100 * censored / probes, probes / index_time,
+               probes / scan_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+
+class Platform:
+    """
+    Rules by which a platform accepts messages: the maximum length of a
+    message and how it normalizes text, which may remove or merge separators.
+    Usage:
+        platform = Platform(max_length=500, normalize=f) - describe platform
+        platform.separator - first candidate separator surviving normalize
+    """
+    def __init__(self, max_length=None, separators=('\x00', '\n', ' '),
+                 normalize=None):
+        """
+        :param max_length: maximum number of characters of a message, or None
+        for no limit
+        :param separators: candidate strings with which to separate the
+        strings of a test, in order of preference
+        :param normalize: function applied by the platform to a message before
+        filtering it, e.g., removing control characters, or None
+        """
+        self.max_length = max_length
+        self.normalize = normalize
+        self.separator = self.choose_separator(separators)
+
+    def choose_separator(self, separators):
+        """Return the first of separators which normalize() neither removes
+        nor merges into the text around it.
+        """
+        for separator in separators:
+            if (self.normalize is None or
+                    'ab' not in self.normalize('a' + separator + 'b')):
+                return separator
+        raise ValueError('platform normalizes away every separator')
+
+
+class SplitTest(Exception):
+    """Raised by a strict MessageOracle for a test too long for one message"""
+
+
+class MessageOracle:
+    """
+    Wrap a callback sending a message, assembling each test into messages
+    within the platform's rules.  Strings of unordered tests which are
+    contained in another are dropped, the rest are joined with the platform's
+    separator, and a test still too long for one message is split into
+    several, each repeating the shortest strings of the test around a window
+    of the others, the test being censored if any of them is.  Consecutive
+    windows overlap, but a combination can only be found within one window, as
+    on the platform itself, so a split test is less likely to be censored than
+    the single message it replaces.  Verdicts are then no longer monotone: a
+    split test may be uncensored although a test it contains, which fits in
+    one message, is censored.  Isolation results are therefore unreliable
+    once any test is split: isolate() flags them, and a strict oracle raises
+    SplitTest rather than split a test.  Each split test is also reported
+    through on_split.
+    Usage:
+        oracle = MessageOracle(sim.send, Platform(max_length=500)) - wrap send
+        was_censored = oracle(test) - use in place of is_censored
+        kw, reliable = oracle.isolate(isolator, s) - isolate a combination,
+                                                     unreliable if split
+        msgs = oracle.messages(test) - messages assembled for test
+        oracle.split, oracle.extra - tests split and extra messages sent
+    """
+    def __init__(self, send, platform=None, ordered=False, overlap=0.75,
+                 on_split=None, strict=False):
+        """
+        :param send: callback returning whether a message is censored
+        :param platform: Platform, by default one without limits
+        :param ordered: whether the order of the strings of a test matters,
+        so that none can be dropped
+        :param overlap: fraction of each window of a split test which the next
+        window repeats, so that combinations spanning up to that fraction of a
+        window are not cut apart
+        :param on_split: called for every split test with the number of
+        messages sent for it in addition to one, which is 0 if the first was
+        censored, e.g., Simulator.report_extra_queries
+        :param strict: whether to raise SplitTest for a test too long for one
+        message rather than split it
+        """
+        self.send = send
+        self.platform = platform or Platform()
+        self.ordered = ordered
+        self.overlap = overlap
+        self.on_split = on_split
+        self.strict = strict
+        self.split = 0
+        self.extra = 0
+
+    def pack(self, test):
+        """Return the strings of test to send, in order, without empty
+        strings or, if unordered, strings contained in another.
+        """
+        strings = [t for t in test if t]
+        if self.ordered:
+            return strings
+        strings.sort(key=len, reverse=True)
+        packed = []
+        for t in strings:
+            if not any(t in p for p in packed):
+                packed.append(t)
+        return packed
+
+    def context(self, strings, max_length):
+        """Return the numbers of strings at the start and at the end of
+        strings, shortest first if unordered, to repeat in every message of a
+        split test, taking up at most half a message.
+        """
+        if not self.ordered:
+            strings.sort(key=len)
+        sep = len(self.platform.separator)
+        length = 0
+        start = end = 0
+        for n, t in enumerate(strings):
+            if length + len(t) + sep > max_length // 2:
+                break
+            length += len(t) + sep
+            start = n + 1
+        if self.ordered:
+            for t in reversed(strings[start:]):
+                if length + len(t) + sep > max_length // 2:
+                    break
+                length += len(t) + sep
+                end += 1
+        return start, end
+
+    def messages(self, test):
+        """Return the list of messages to send for test"""
+        strings = self.pack(test)
+        separator = self.platform.separator
+        msg = separator.join(strings)
+        max_length = self.platform.max_length
+        if max_length is None or len(msg) <= max_length:
+            return [msg]
+        start, end = self.context(strings, max_length)
+        before, after = strings[:start], strings[len(strings)-end:]
+        body = separator.join(strings[start:len(strings)-end])
+        window = max_length - len(separator.join(before + [''] + after))
+        if window <= 0:
+            raise ValueError('test of %d characters does not fit in messages '
+                             'of %d' % (len(msg), max_length))
+        step = max(int(window * (1 - self.overlap)), 1)
+        return [separator.join(before + [body[n:n+window]] + after)
+                for n in range(0, max(len(body) - window + step, 1), step)]
+
+    def __call__(self, test):
+        msgs = self.messages(test)
+        if len(msgs) > 1 and self.strict:
+            raise SplitTest('test of %d characters needs %d messages' %
+                            (len(self.platform.separator.join(test)),
+                             len(msgs)))
+        sent = 0
+        was_censored = False
+        for msg in msgs:
+            sent += 1
+            if self.send(msg):
+                was_censored = True
+                break
+        if len(msgs) > 1:
+            self.split += 1
+            self.extra += sent - 1
+            if self.on_split is not None:
+                self.on_split(sent - 1)
+        return was_censored
+
+    def isolate(self, isolator, s):
+        """Isolate a keyword combination in s, answering the tests of isolator
+        with the oracle.
+        :param isolator: callback isolator taking s and is_censored, e.g.,
+        algorithms.comp_aware_bin_split
+        :return: (kw, reliable), the combination isolated and whether no test
+        was split, without which kw may be wrong
+        """
+        split = self.split
+        kw = isolator(s, self)
+        return kw, self.split == split
+
+
+def main():
+    import argparse
+    import importlib
+    import corpus
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Isolate keyword combinations over a simulated platform '
+                    'which limits message length and strips control '
+                    'characters.')
+    parser.add_argument('--variant', default='algorithms')
+    parser.add_argument('--isolator', default='comp_aware_bin_split_2')
+    parser.add_argument('--max-length', type=int, default=200)
+    parser.add_argument('--length', type=int, default=300,
+                        help='number of characters of each article')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--strict', action='store_true',
+                        help='abandon an isolation rather than split a test')
+    args = parser.parse_args()
+    module = importlib.import_module(args.variant)
+    isolator = getattr(module, args.isolator)
+    ordered = args.variant.endswith('-ordered')
+    articles, keywords = corpus.generate(args.articles, 1000,
+                                         length=args.length)
+    strip = lambda msg: ''.join(c for c in msg if c >= ' ' or c == '\n')
+    sim = Simulator(articles, keywords if ordered else
+                    {frozenset(kw) for kw in keywords},
+                    max_length=args.max_length, normalize=strip)
+    platform = Platform(args.max_length, normalize=strip)
+    oracle = MessageOracle(sim.send, platform, ordered,
+                           on_split=sim.report_extra_queries,
+                           strict=args.strict)
+    if hasattr(module, 'isolate'):
+        isolate = lambda s, oracle: module.isolate(isolator(s), sim, oracle)
+    else:
+        isolate = isolator
+    # correct results of all isolations and of reliable ones
+    correct = [0, 0]
+    reliable = abandoned = 0
+    for art in sim.get_articles():
+        try:
+            kw, ok = oracle.isolate(isolate, art)
+        except SplitTest:
+            abandoned += 1
+            continue
+        found = sim.kws_in_this_article()
+        right = set(kw) in found or tuple(kw) in found
+        reliable += ok
+        correct[0] += right
+        correct[1] += right and ok
+    n = sim.this_article + 1
+    print('separator %r, %.2f queries per article of which %.2f extra, '
+          '%d tests split' % (platform.separator, sim.queries / n,
+                              sim.extra_queries / n, sim.split_tests))
+    print('%d isolations abandoned, %d unreliable, %.1f%% correct, %.1f%% of '
+          'reliable ones' % (abandoned, n - abandoned - reliable,
+                             100 * correct[0] / n,
+                             100 * correct[1] / max(reliable, 1)))
+
+if __name__ == "__main__":
+    main()
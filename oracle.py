@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class CachedOracle:
+    """
+    Wrap an is_censored callback with a cache of verdicts so that tests which
+    were already answered are not sent to the platform again.  Tests are keyed
+    on their canonical form: a frozenset of strings, or a tuple of strings for
+    the ordered variants of the algorithms.  It may be called from several
+    threads at once, e.g., by isolation.generators.drive() with an executor.
+    Usage:
+        oracle = CachedOracle(is_censored) - wrap is_censored
+        oracle = CachedOracle(is_censored, ordered=True, maxsize=10000,
+                              path='cache.json') - bounded, persisted cache
+        was_censored = oracle(test) - use in place of is_censored
+        oracle.hits, oracle.misses - number of answered and forwarded tests
+        oracle.save() - write the cached verdicts to path
+    """
+    def __init__(self, is_censored, ordered=False, maxsize=None, path=None):
+        """
+        :param is_censored: callback returning whether a collection of strings
+        is censored
+        :param ordered: whether the order of the strings in a test matters
+        :param maxsize: maximum number of cached verdicts, evicting the least
+        recently used, or None for no limit
+        :param path: file from which to load and to which to save verdicts
+        """
+        self.is_censored = is_censored
+        self.ordered = ordered
+        self.maxsize = maxsize
+        self.path = path
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def key(self, test):
+        """Return the canonical form of test"""
+        return tuple(test) if self.ordered else frozenset(test)
+
+    def __call__(self, test):
+        key = self.key(test)
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            self.misses += 1
+        was_censored = self.is_censored(test)
+        self.store(key, was_censored)
+        return was_censored
+
+    def store(self, key, was_censored):
+        """Record the verdict for canonical test key"""
+        with self.lock:
+            self.cache[key] = was_censored
+            self.cache.move_to_end(key)
+            if self.maxsize is not None and len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+    def load(self, path=None):
+        """Add the verdicts saved in path to the cache"""
+        with open(path or self.path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved['ordered'] != self.ordered:
+            raise ValueError('cache in %s has ordered=%s' %
+                             (path or self.path, saved['ordered']))
+        for test, was_censored in saved['verdicts']:
+            self.store(self.key(test), was_censored)
+
+    def save(self, path=None):
+        """Write the cached verdicts to path, least recently used first"""
+        path = path or self.path
+        if path is None:
+            raise ValueError('no cache path given or set')
+        with self.lock:
+            verdicts = [[list(key), was_censored]
+                        for key, was_censored in self.cache.items()]
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'ordered': self.ordered, 'verdicts': verdicts}, f,
+                      ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+
+class BatchOracle:
+    """
+    Answer tests through a platform API which takes several messages per call
+    and returns a verdict for each, packing as many messages into each call as
+    fit within the platform's limits.  Lists of tests yielded by the
+    coroutine isolators, or probed at once by the binary searches of the
+    algorithms isolators, are answered by batch().
+    Usage:
+        oracle = BatchOracle(send_batch, max_size=4000) - wrap send_batch
+        was_censored = oracle(test) - use in place of is_censored
+        verdicts = oracle.batch(tests) - answer several tests
+        oracle.calls, oracle.messages - number of calls and messages sent
+    """
+    def __init__(self, send_batch, separator='\x00', max_size=None,
+                 max_messages=None):
+        """
+        :param send_batch: callback taking a list of messages and returning
+        whether each was censored
+        :param separator: string with which to join the strings of a test
+        :param max_size: maximum total length of the messages of one call, or
+        None for no limit; a message longer than this is sent on its own
+        :param max_messages: maximum number of messages of one call, or None
+        for no limit
+        """
+        self.send_batch = send_batch
+        self.separator = separator
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.calls = 0
+        self.messages = 0
+
+    def pack(self, messages):
+        """Split messages, in order, into the lists of messages to send in
+        each call.
+        """
+        batches, batch, size = [], [], 0
+        for msg in messages:
+            if batch and ((self.max_size is not None and
+                           size + len(msg) > self.max_size) or
+                          len(batch) == self.max_messages):
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(msg)
+            size += len(msg)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def batch(self, tests):
+        """Return the list of verdicts for tests"""
+        verdicts = []
+        for batch in self.pack([self.separator.join(test) for test in tests]):
+            self.calls += 1
+            self.messages += len(batch)
+            verdicts.extend(self.send_batch(batch))
+        return verdicts
+
+    def __call__(self, test):
+        return self.batch([test])[0]
+
+
+def contains(big, small, ordered=False):
+    """Return whether every string in small is a substring of some string in
+    big, in which case big is censored whenever small is.  If ordered, the
+    strings of small must moreover lie in distinct strings of big in the same
+    order.
+    """
+    if not ordered:
+        return all(any(t in u for u in big) for t in small)
+    big = iter(big)
+    return all(any(t in u for u in big) for t in small)
+
+
+class InferenceOracle:
+    """
+    Wrap an is_censored callback so that tests whose verdicts are implied by
+    earlier verdicts are answered locally.  Censorship is monotone: if a test
+    is censored, so is any test containing it, and if a test is not censored,
+    neither is any test it contains, where containment is as in contains().
+    It may be called from several threads at once.
+    Usage:
+        oracle = InferenceOracle(is_censored) - wrap is_censored
+        was_censored = oracle(test) - use in place of is_censored
+        isolator = oracle.filter(isolator) - answer a coroutine's tests
+        oracle.inferred, oracle.queries - number of inferred and sent tests
+        oracle.reset() - forget verdicts, e.g., before the next article
+    """
+    def __init__(self, is_censored, ordered=False, on_inferred=None):
+        """
+        :param is_censored: callback returning whether a collection of strings
+        is censored, or None if only used through filter()
+        :param ordered: whether the order of the strings in a test matters
+        :param on_inferred: called with no arguments whenever a verdict is
+        inferred, e.g., Simulator.report_inferred_query
+        """
+        self.is_censored = is_censored
+        self.ordered = ordered
+        self.on_inferred = on_inferred
+        self.inferred = 0
+        self.queries = 0
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all known verdicts"""
+        # minimal known censored tests and maximal known uncensored tests
+        with self.lock:
+            self.censored = []
+            self.uncensored = []
+
+    def infer(self, test):
+        """Return the verdict for test implied by known verdicts, or None"""
+        if any(contains(test, known, self.ordered) for known in self.censored):
+            return True
+        if any(contains(known, test, self.ordered)
+               for known in self.uncensored):
+            return False
+        return None
+
+    def record(self, test, was_censored):
+        """Add the verdict for test to the known verdicts"""
+        test = tuple(test)
+        with self.lock:
+            if was_censored:
+                self.censored = [known for known in self.censored
+                                 if not contains(known, test, self.ordered)]
+                self.censored.append(test)
+            else:
+                self.uncensored = [known for known in self.uncensored
+                                   if not contains(test, known, self.ordered)]
+                self.uncensored.append(test)
+
+    def __call__(self, test):
+        test = tuple(test)
+        with self.lock:
+            was_censored = self.infer(test)
+            if was_censored is None:
+                self.queries += 1
+        if was_censored is not None:
+            self.count_inferred()
+            return was_censored
+        was_censored = self.is_censored(test)
+        self.record(test, was_censored)
+        return was_censored
+
+    def count_inferred(self):
+        """Record that a verdict was inferred rather than queried"""
+        with self.lock:
+            self.inferred += 1
+        if self.on_inferred is not None:
+            self.on_inferred()
+
+    def filter(self, isolator):
+        """Wrap coroutine isolator such that only tests whose verdicts cannot
+        be inferred are yielded, recording the verdicts sent back for them.
+        """
+        was_censored = None
+        while True:
+            try:
+                test = isolator.send(was_censored)
+            except StopIteration as e:
+                return e.value
+            tests = test if isinstance(test, list) else [test]
+            verdicts = [self.infer(t) for t in tests]
+            unknown = [t for t, v in zip(tests, verdicts) if v is None]
+            for _ in range(len(tests) - len(unknown)):
+                self.count_inferred()
+            if len(unknown) == 1:
+                answers = iter([(yield unknown[0])])
+            elif unknown:
+                answers = iter((yield unknown))
+            else:
+                answers = iter(())
+            for n, t in enumerate(tests):
+                if verdicts[n] is None:
+                    verdicts[n] = next(answers)
+                    self.queries += 1
+                    self.record(t, verdicts[n])
+            was_censored = verdicts if isinstance(test, list) else verdicts[0]
+
+class VotingOracle:
+    """
+    Wrap an is_censored callback whose verdicts may be wrong, querying a test
+    again only when its verdicts are inconsistent: when the same test gets
+    different verdicts, or when its verdict contradicts monotonicity (see
+    InferenceOracle), i.e., a test found censored is contained in a test
+    found uncensored.  The tests involved are then queried until either
+    verdict has a majority of votes, after which they are answered without
+    querying them again.  A test asked again before it is settled is queried
+    once more each time, as is a test repeated by another isolation.
+    Usage:
+        oracle = VotingOracle(is_censored, votes=3) - wrap is_censored
+        was_censored = oracle(test) - use in place of is_censored
+        kw = oracle.isolate(isolator, s) - isolate and verify a combination
+        kw = oracle.isolate(isolator, s, verify=False) - isolate it only
+        oracle.queries, oracle.repeated - number of queries and repetitions
+        oracle.reset() - forget verdicts, e.g., before the next article
+    """
+    def __init__(self, is_censored, ordered=False, votes=3):
+        """
+        :param is_censored: callback returning whether a collection of strings
+        is censored
+        :param ordered: whether the order of the strings in a test matters
+        :param votes: maximum number of times to query a test, an odd number
+        """
+        self.is_censored = is_censored
+        self.ordered = ordered
+        self.majority = votes // 2 + 1
+        self.queries = 0
+        self.repeated = 0
+        self.reset()
+
+    def reset(self):
+        """Forget all verdicts"""
+        # [test, censored votes, uncensored votes] of every test queried
+        self.entries = {}
+
+    def key(self, test):
+        return tuple(test) if self.ordered else frozenset(test)
+
+    def settled(self, entry):
+        return max(entry[1], entry[2]) >= self.majority
+
+    def settle(self, entry):
+        """Query entry's test until either verdict has a majority"""
+        while not self.settled(entry):
+            self.vote(entry)
+            self.repeated += 1
+
+    def vote(self, entry):
+        self.queries += 1
+        if self.is_censored(entry[0]):
+            entry[1] += 1
+        else:
+            entry[2] += 1
+
+    def conflicts(self, entry):
+        """Return the entries whose verdicts contradict that of entry, unless
+        both are settled.
+        """
+        test, was_censored = entry[0], entry[1] > entry[2]
+        conflicts = []
+        for known in self.entries.values():
+            if ((known[1] > known[2]) == was_censored or
+                    (self.settled(known) and self.settled(entry))):
+                continue
+            if was_censored:
+                big, small = known[0], test
+            else:
+                big, small = test, known[0]
+            if contains(big, small, self.ordered):
+                conflicts.append(known)
+        return conflicts
+
+    def __call__(self, test):
+        test = tuple(test)
+        entry = self.entries.setdefault(self.key(test), [test, 0, 0])
+        if not self.settled(entry):
+            self.vote(entry)
+            if entry[1] and entry[2]:
+                self.settle(entry)
+            conflicts = self.conflicts(entry)
+            while conflicts:
+                for known in [entry] + conflicts:
+                    self.settle(known)
+                conflicts = self.conflicts(entry)
+        return entry[1] > entry[2]
+
+    def verify(self, C):
+        """Return whether C is a minimal censored combination: it is censored,
+        but not without any of its components or with any component shortened
+        by a character.  Any verdict contradicting this is settled by votes.
+        """
+        C = tuple(C)
+        tests = [(C, True)]
+        for n, c in enumerate(C):
+            tests.append((C[:n] + C[n+1:], False))
+            if len(c) > 1:
+                tests.append((C[:n] + (c[1:],) + C[n+1:], False))
+                tests.append((C[:n] + (c[:-1],) + C[n+1:], False))
+        for test, expected in tests:
+            if self(test) != expected:
+                entry = self.entries[self.key(test)]
+                self.settle(entry)
+                if (entry[1] > entry[2]) != expected:
+                    return False
+        return True
+
+    def isolate(self, isolator, s, retries=2, verify=True):
+        """Isolate a keyword combination in s, and if verify, verify it,
+        isolating it again up to retries times if it fails verification.
+        Verification costs up to three probes per component.  Tests whose
+        verdicts are not settled are queried once more when asked again after
+        a failure, so that wrong verdicts which led to it are likely to be
+        contradicted and settled.
+        :param isolator: callback isolator taking s and is_censored, e.g.,
+        algorithms.comp_aware_bin_split
+        :return: last combination isolated
+        """
+        for _ in range(retries + 1):
+            C = isolator(s, self)
+            if not verify or self.verify(C):
+                break
+        return C
+
+def main():
+    import tempfile
+    from algorithms import comp_aware_bin_split
+    from simulator import Simulator
+    sim = Simulator()
+    def is_censored(test):
+        separator = '\x00' # will be platform specific
+        return sim.send(separator.join(test))
+    path = os.path.join(tempfile.mkdtemp(), 'cache.json')
+    for run in range(2):
+        oracle = CachedOracle(is_censored, path=path)
+        sim.this_article = -1
+        for art in sim.get_articles():
+            kw = comp_aware_bin_split(art, oracle)
+            sim.report_found_keyword(kw)
+            print(sim.query_log[sim.this_article])
+        print('run %d: %d hits, %d misses' % (run, oracle.hits, oracle.misses))
+        oracle.save()
+    sim.this_article = -1
+    for art in sim.get_articles():
+        oracle = InferenceOracle(is_censored,
+                                 on_inferred=sim.report_inferred_query)
+        kw = comp_aware_bin_split(art, oracle)
+        sim.report_found_keyword(kw)
+        print('%d queries, %d inferred' %
+              (sim.query_log[sim.this_article],
+               sim.inferred_log[sim.this_article]))
+
+if __name__ == "__main__":
+    main()
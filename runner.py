@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import json
+import multiprocessing
+
+import corpus
+from simulator import Simulator
+
+# per-process state, set in the parent before forking workers or by init()
+worker = {}
+
+
+def init(keywords, variant, isolator):
+    """Set up the Simulator and isolator of a worker process, unless they
+    were inherited from the parent.
+    """
+    if 'sim' not in worker:
+        worker['sim'] = Simulator([], keywords)
+    module = importlib.import_module(variant)
+    worker['module'] = module
+    worker['isolator'] = getattr(module, isolator)
+
+def isolate(item):
+    """Isolate a keyword combination in one article in a worker process.
+    :param item: (index, text) of the article
+    :return: dict reporting the article's index, number of queries, isolated
+    keyword combination and whether it is present in the article
+    """
+    n, text = item
+    sim, module, isolator = worker['sim'], worker['module'], worker['isolator']
+    sim.this_article, sim.article = n, text
+    sim.query_log[n] = sim.inferred_log[n] = 0
+    if hasattr(module, 'isolate'):
+        kw = module.isolate(isolator(text), sim)
+    else:
+        def is_censored(test):
+            separator = '\x00' # will be platform specific
+            return sim.send(separator.join(test))
+        kw = isolator(text, is_censored)
+    found = sim.kws_in_this_article()
+    del sim.inferred_log[n]
+    return {
+        'article': n,
+        'queries': sim.query_log.pop(n),
+        'keyword': sorted(kw) if isinstance(kw, set) else list(kw),
+        'correct': set(kw) in found or tuple(kw) in found,
+    }
+
+def run(articles, keywords, variant='algorithms',
+        isolator='comp_aware_bin_split', processes=None, chunksize=16):
+    """Isolate a keyword combination in every article using a pool of worker
+    processes, each with its own Simulator.  Where processes are forked, the
+    workers share the parent's keyword matcher rather than each building one.
+    :param articles: iterable of articles, read lazily
+    :param keywords: keyword combinations, or the path of a keywords file
+    :param variant: name of the module to take isolator from
+    :param isolator: name of the isolating function
+    :return: iterator over the reports of isolate(), in the order of articles
+    """
+    if isinstance(keywords, str):
+        keywords = list(corpus.iter_keywords(
+            keywords, ordered=variant.endswith('-ordered')))
+    if multiprocessing.get_start_method() == 'fork':
+        worker['sim'] = Simulator([], keywords)
+    with multiprocessing.Pool(processes, init,
+                              (keywords, variant, isolator)) as pool:
+        yield from pool.imap(isolate, enumerate(articles), chunksize)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Isolate keyword combinations in a corpus of articles '
+                    'using a pool of worker processes.')
+    parser.add_argument('articles', help='file of articles')
+    parser.add_argument('keywords', help='file of keyword combinations')
+    parser.add_argument('--variant', default='algorithms')
+    parser.add_argument('--isolator', default='comp_aware_bin_split')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--chunksize', type=int, default=16)
+    parser.add_argument('--output', help='write per-article reports as JSON '
+                                         'Lines')
+    args = parser.parse_args()
+
+    reports = run(corpus.read_articles(args.articles), args.keywords,
+                  args.variant, args.isolator, args.processes, args.chunksize)
+    f = open(args.output, 'w', encoding='utf-8') if args.output else None
+    n = queries = correct = 0
+    for report in reports:
+        if f:
+            f.write(json.dumps(report, ensure_ascii=False) + '\n')
+        n += 1
+        queries += report['queries']
+        correct += report['correct']
+    if f:
+        f.close()
+    print('%d articles, %.2f queries per article, %.1f%% correct' %
+          (n, queries / n, 100 * correct / n))
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
+import random
+import threading
+from itertools import islice
+
+import corpus
+from matcher import KeywordMatcher
+from spans import Probe
+
 # populate this list with articles to test
 articles = [
     "委员会共同主席在报告发布记者会上表示：“这份报告是针对中国政府持续并广泛侵犯人权问题现"
@@ -28,61 +36,243 @@ class Simulator:
     combination isolating algorithms.
     Usage:
         sim = Simulator() - inits and loads kws and articles
+        sim = Simulator('articles.jsonl.gz', 'keywords.jsonl.gz',
+                        log_size=1000) - streams articles from disk
+        sim = Simulator(false_negative=0.05, seed=0) - report wrong verdicts
+                                                       at random
         this_art = sim.get_article() - get text of next article to test
         is_censored = sim.send(msg) - simulate whether message would be filtered
                                       based on kw list
+        verdicts = sim.send_batch(msgs) - simulate sending several messages
+                                          in one call
+        is_censored = sim.send_probe(probe) - simulate sending a
+                                              spans.Probe over the article
+        sim.report_inferred_query() - report query saved by inference
+        sim.report_extra_queries(n) - report a split test and the messages
+                                      added by splitting it
         sim.report_found_keyword(proposed_kw) - report kw that algorithm found
+        sim.report_found_keywords(proposed_kws) - report all kws found
         sim.kws_in_this_article() - return all keywords present in article
     """
-    def __init__(self):
-        self.articles = articles.copy()
-        self.keywords = keywords.copy()
+    def __init__(self, articles=articles, keywords=keywords, log_size=None,
+                 max_length=None, normalize=None, false_positive=0.0,
+                 false_negative=0.0, seed=None, store=None, ordered=False):
+        """
+        :param articles: list of articles to test, by default the module's, or
+        an iterable from which to read them lazily each time get_articles() is
+        called, such as a corpus.ArticleFile, or the path of such a file
+        :param keywords: iterable of sensitive keyword combinations, by default
+        the module's, which is only read once, or the path of a file written by
+        corpus.write_keywords()
+        :param log_size: number of most recent articles for which to keep
+        query_log, inferred_log and extra_log entries, or None to keep all of
+        them
+        :param max_length: maximum number of characters of a message, longer
+        messages being rejected with a ValueError, or None for no limit
+        :param normalize: function applied to each message before filtering
+        it, e.g., removing control characters, or None
+        :param false_positive: probability that an uncensored message is
+        reported as censored
+        :param false_negative: probability that a censored message is reported
+        as uncensored
+        :param seed: seed of the random number generator of these errors
+        :param store: store.KeywordStore in which to record the keywords
+        correctly reported found, or None
+        :param ordered: whether the keyword combinations read from a keywords
+        path are ordered, i.e., read as tuples rather than frozensets
+        """
+        if isinstance(articles, str):
+            articles = corpus.read_articles(articles)
+        if isinstance(keywords, str):
+            keywords = corpus.iter_keywords(keywords, ordered)
+        self.articles = articles.copy() if isinstance(articles, list) \
+            else articles
+        self.matcher = KeywordMatcher(keywords)
+        self.keywords = self.matcher.keywords
+        self.log_size = log_size
+        self.max_length = max_length
+        self.normalize = normalize
+        self.false_positive = false_positive
+        self.false_negative = false_negative
+        self.rng = random.Random(seed)
+        self.store = store
+        self.article = None
+        self.index = None
         self.this_article = -1
         self.queries = 0
+        self.batches = 0
+        self.extra_queries = 0
+        self.split_tests = 0
         self.query_log = {}
+        self.inferred_log = {}
+        self.extra_log = {}
+        self.lock = threading.Lock()
 
-        print("Simulator initialized with %d articles and %d keywords" %
-              (len(self.articles), len(self.keywords)))
+        if isinstance(self.articles, list):
+            print("Simulator initialized with %d articles and %d keywords" %
+                  (len(self.articles), len(self.keywords)))
+        else:
+            print("Simulator initialized with streamed articles and %d "
+                  "keywords" % len(self.keywords))
 
     def get_articles(self):
         """Return text of next article"""
-        while self.this_article + 1 < len(self.articles):
+        for article in islice(self.articles, self.this_article + 1, None):
             self.this_article += 1
+            self.article = article
+            self.index = self.matcher.index(article)
             self.query_log[self.this_article] = 0
-            yield self.articles[self.this_article]
+            self.inferred_log[self.this_article] = 0
+            self.extra_log[self.this_article] = 0
+            if self.log_size is not None:
+                for log in (self.query_log, self.inferred_log, self.extra_log):
+                    while len(log) > self.log_size:
+                        del log[next(iter(log))]
+            yield article
 
-    def send(self, msg):
+    def send(self, msg, article=None):
         """Returns whether the message would have been censored based on the kws
         implemented.
+        :param article: index of the article to log the query against, if not
+        the current article
+        """
+        self._check_length(len(msg))
+        self._log_query(article)
+        if self.normalize is not None:
+            msg = self.normalize(msg)
+        return self._add_noise(self.matcher.is_censored(msg))
+
+    def send_probe(self, probe, separator='\x00', article=None):
+        """Returns whether the message joining the strings of probe, a
+        spans.Probe, with separator would have been censored, as send() does,
+        but looking up the spans of a probe over the current article in the
+        article's occurrence index, in time independent of their length.
+        Other probes, tests which are not Probes, and every test if messages
+        are normalized, are joined and sent.
+        :param separator: string contained in no component
+        :param article: index of the article to log the query against, if not
+        the current article
+        """
+        if (self.normalize is not None or not isinstance(probe, Probe) or
+                any(span.text is not self.article for span in probe.spans)):
+            return self.send(separator.join(probe), article)
+        self._check_length(probe.length(len(separator)))
+        self._log_query(article)
+        spans = [(span.start, span.end) for span in probe.spans]
+        return self._add_noise(
+            self.matcher.spans_censored(self.index, spans, len(separator)))
+
+    def _check_length(self, length):
+        """Raise a ValueError if a message of length characters is too long"""
+        if self.max_length is not None and length > self.max_length:
+            raise ValueError('message of %d characters exceeds the maximum of '
+                             '%d' % (length, self.max_length))
+
+    def _log_query(self, article=None):
+        """Count a message sent, logging it against article, by default the
+        current article.
+        """
+        if article is None:
+            article = self.this_article
+        with self.lock:
+            self.queries += 1
+            self.query_log[article] = self.query_log.get(article, 0) + 1
+
+    def _add_noise(self, was_censored):
+        """Return was_censored, wrong with the probability of a false
+        positive or negative.
         """
-        self.queries += 1
-        self.query_log[self.this_article] += 1
-        is_censored = False
-        for this_kw in self.keywords:
-            if all(k in msg for k in this_kw):
-                is_censored = True
-                break
-        return is_censored
-
-    def report_found_keyword(self, proposed_kw):
+        if self.false_positive or self.false_negative:
+            with self.lock:
+                error = self.rng.random()
+            if error < (self.false_negative if was_censored else
+                        self.false_positive):
+                return not was_censored
+        return was_censored
+
+    def send_batch(self, msgs, article=None):
+        """Returns whether each of several messages sent in one call would have
+        been censored.
+        :param article: index of the article to log the queries against, if
+        not the current article
+        """
+        with self.lock:
+            self.batches += 1
+        return [self.send(msg, article) for msg in msgs]
+
+    def report_inferred_query(self):
+        """Record a message whose verdict was inferred by the algorithm without
+        sending it, i.e., a query saved.
+        """
+        with self.lock:
+            self.inferred_log[self.this_article] += 1
+
+    def report_extra_queries(self, n, article=None):
+        """Record a test which did not fit in one message and was split, and
+        the n messages sent for it in addition to one, i.e., the extra cost of
+        the message length limit.  The verdicts of split tests may be wrong
+        (see messages.MessageOracle), so split_tests counts them.
+        """
+        if article is None:
+            article = self.this_article
+        with self.lock:
+            self.split_tests += 1
+            self.extra_queries += n
+            self.extra_log[article] = self.extra_log.get(article, 0) + n
+
+    def report_found_keyword(self, proposed_kw, article=None):
         """Take a found keyword and return whether the keyword was correctly
         identified.
+        :param article: index of the article in which the keyword was found, if
+        not the current article
         """
-        kws_in_this_article = self.kws_in_this_article()
-        if set(proposed_kw) in kws_in_this_article:
+        if article is None:
+            article = self.this_article
+        kws_in_this_article = self.kws_in_this_article(article)
+        if (set(proposed_kw) in kws_in_this_article or
+                tuple(proposed_kw) in kws_in_this_article):
+            if self.store is not None:
+                self.store.record(proposed_kw)
             return True
         else:
-            print('article index: %d' % self.this_article)
+            print('article index: %d' % article)
             print('found_combo: %s', proposed_kw)
             print('expected combo: %s', [tuple(sorted(combo)) for combo in kws_in_this_article])
             return False
 
-    def kws_in_this_article(self):
+    def report_found_keywords(self, proposed_kws, article=None):
+        """Take all keywords found in an article and return whether they are
+        exactly the keywords present, ignoring those keywords which contain
+        another present keyword, since whenever they trigger censorship the
+        other one does too.
+        :param article: index of the article in which the keywords were found,
+        if not the current article
+        """
+        if article is None:
+            article = self.this_article
+        kws_in_this_article = self.kws_in_this_article(article)
+        expected = [kw for kw in kws_in_this_article
+                    if not any(set(other) < set(kw)
+                               for other in kws_in_this_article)]
+        found = [kw for kw in expected
+                 if set(kw) in map(set, proposed_kws) or
+                 tuple(kw) in map(tuple, proposed_kws)]
+        if len(found) == len(expected) == len(proposed_kws):
+            if self.store is not None:
+                for kw in proposed_kws:
+                    self.store.record(kw)
+            return True
+        else:
+            print('article index: %d' % article)
+            print('found_combos: %s', proposed_kws)
+            print('expected combos: %s', [tuple(sorted(combo)) for combo in expected])
+            return False
+
+    def kws_in_this_article(self, article=None):
         """Return keywords that are present in the current article
-        :return: list of kws as frozenset
+        :param article: index of the article to use instead of the current one
+        :return: list of kws as frozenset (or tuple for ordered kws)
         """
-        kws_in_art = []
-        for this_kw in self.keywords:
-            if all([k in self.articles[self.this_article] for k in this_kw]):
-                kws_in_art.append(this_kw)
-        return kws_in_art
+        if article is None or article == self.this_article:
+            return self.matcher.matches(self.article)
+        return self.matcher.matches(self.articles[article])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+
+class Span:
+    """
+    Zero-copy view of text[start:end] supporting the string operations used by
+    the algorithms: len(), slicing, which returns another Span over the same
+    text, and concatenation of adjacent Spans.  The substring itself is only
+    created by str().
+    """
+    __slots__ = ('text', 'start', 'end')
+
+    def __init__(self, text, start=0, end=None):
+        self.text = text
+        self.start = start
+        self.end = len(text) if end is None else end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self.end - self.start)
+        start += self.start
+        return Span(self.text, start, max(start, stop + self.start))
+
+    def __add__(self, other):
+        if other.text is not self.text or other.start != self.end:
+            raise ValueError('can only concatenate adjacent spans')
+        return Span(self.text, self.start, other.end)
+
+    def __eq__(self, other):
+        return (isinstance(other, Span) and other.text is self.text and
+                other.start == self.start and other.end == self.end)
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    def __str__(self):
+        return self.text[self.start:self.end]
+
+    def __repr__(self):
+        return 'Span(%d, %d)' % (self.start, self.end)
+
+
+class Probe:
+    """
+    Test message given as a collection of Spans over the same text, to be
+    passed to is_censored in place of a collection of strings.  Iterating
+    renders the strings, so that is_censored can still join them, whereas
+    key() identifies the test and length() measures it without rendering
+    anything.
+    """
+    __slots__ = ('spans', 'phase')
+
+    def __init__(self, spans, phase=None):
+        """
+        :param spans: set of Spans, or tuple of Spans if their order matters
+        :param phase: name of the phase of the algorithm issuing the test
+        """
+        self.spans = spans
+        self.phase = phase
+
+    def __iter__(self):
+        for span in self.spans:
+            yield str(span)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def length(self, separator_length=1):
+        """Return the length of the message joining the strings with a
+        separator of separator_length characters, without rendering it.
+        """
+        return (sum(len(span) for span in self.spans) +
+                separator_length * max(len(self.spans) - 1, 0))
+
+    def key(self):
+        """Return the (start, end) pairs of the spans, as a tuple if their
+        order matters or as a frozenset otherwise.
+        """
+        pairs = ((span.start, span.end) for span in self.spans)
+        if isinstance(self.spans, tuple):
+            return tuple(pairs)
+        return frozenset(pairs)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import time
+
+
+class Speculator:
+    """
+    Run a chain of dependent probes, where each probe is chosen by the verdict
+    of the one before, sending with each probe the probes which follow it
+    under either verdict.  Each round trip then resolves two decisions rather
+    than one, at the cost of the probe of the branch not taken.  This only
+    saves time if the probes of a round are sent concurrently, through an
+    executor or a batch oracle (see oracle.BatchOracle).
+    A chain is described by a step function taking a state and returning
+    None if the state is final, or else a (test, advance) pair, where advance
+    takes the verdict of test and returns the next state.
+    Usage:
+        speculator = Speculator() - keep statistics over many chains
+        state = yield from speculator.search(state, step) - run chain in a
+                                                            coroutine isolator
+        speculator.rounds_saved, speculator.wasted - round trips saved and
+                                                     extra queries spent
+    """
+    def __init__(self):
+        self.rounds = 0
+        self.decisions = 0
+        self.wasted = 0
+
+    @property
+    def rounds_saved(self):
+        """Number of round trips saved over sending the probes one by one"""
+        return self.decisions - self.rounds
+
+    def search(self, state, step):
+        """Coroutine running the chain from state, yielding a test, or a list
+        of tests if more than one, for each round and returning the final
+        state.
+        """
+        current = step(state)
+        while current:
+            test, advance = current
+            branches = [advance(True), advance(False)]
+            following = [step(branch) for branch in branches]
+            tests = [test] + [f[0] for f in following if f]
+            verdicts = yield tests if len(tests) > 1 else test
+            if len(tests) == 1:
+                verdicts = [verdicts]
+            self.rounds += 1
+            self.decisions += 1
+            taken = 0 if verdicts[0] else 1
+            state = branches[taken]
+            if following[taken]:
+                n = 1 if taken == 0 or not following[0] else 2
+                state = following[taken][1](verdicts[n])
+                self.decisions += 1
+            self.wasted += len(tests) - 1 - bool(following[taken])
+            current = step(state)
+        return state
+
+
+def main():
+    import argparse
+    import importlib
+    from concurrent.futures import ThreadPoolExecutor
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Compare comp_aware_bin_split_2 with and without '
+                    'speculative probes over an oracle with a fixed latency.')
+    parser.add_argument('--variant', default='algorithms')
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='seconds taken by each query')
+    args = parser.parse_args()
+    module = importlib.import_module(args.variant)
+    sim = Simulator()
+    def is_censored(test):
+        separator = '\x00' # will be platform specific
+        time.sleep(args.latency)
+        return sim.send(separator.join(test))
+    with ThreadPoolExecutor(3) as executor:
+        for speculator in (None, Speculator()):
+            sim.this_article = -1
+            queries = sim.queries
+            start = time.perf_counter()
+            for art in sim.get_articles():
+                if hasattr(module, 'isolate'):
+                    kw = module.isolate(module.comp_aware_bin_split_2(
+                        art, speculator=speculator), sim,
+                        is_censored, executor)
+                else:
+                    kw = module.comp_aware_bin_split_2(
+                        art, is_censored, executor=executor,
+                        speculator=speculator)
+                sim.report_found_keyword(kw)
+            print('%-11s %4d queries %7.3fs' %
+                  ('speculative' if speculator else 'sequential',
+                   sim.queries - queries, time.perf_counter() - start))
+    print('%d round trips saved for %d extra queries' %
+          (speculator.rounds_saved, speculator.wasted))
+
+if __name__ == "__main__":
+    main()
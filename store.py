@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import time
+
+from matcher import KeywordMatcher
+
+
+class KeywordStore:
+    """
+    Persistent record of the keyword combinations isolated so far, with the
+    time each was first and last found and the number of times it was found,
+    so that knowledge accumulates across runs.  Combinations are keyed on
+    their canonical form, a frozenset of strings, or a tuple of strings if
+    their order matters.  Lookups are dictionary lookups, and matcher()
+    returns a matcher.KeywordMatcher over the stored combinations, most found
+    first, for use as the known argument of the isolators' known_first().
+    Usage:
+        store = KeywordStore(path='keywords.json') - load store if it exists
+        sim = Simulator(store=store) - record correctly reported keywords
+        store.record(kw) - record that kw was found
+        kw in store, store.get(kw) - whether and how kw was found
+        kws = store.matches(text) - stored combinations present in text
+        store.save() - write the store to path
+    """
+    def __init__(self, ordered=False, path=None):
+        """
+        :param ordered: whether the order of the components of a combination
+        matters
+        :param path: file from which to load and to which to save the store
+        """
+        self.ordered = ordered
+        self.path = path
+        # canonical combination -> [first found, last found, times found]
+        self.entries = {}
+        self._matcher = None
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def key(self, kw):
+        """Return the canonical form of kw"""
+        return tuple(kw) if self.ordered else frozenset(kw)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, kw):
+        return self.key(kw) in self.entries
+
+    def get(self, kw):
+        """Return (first found, last found, times found) for kw, as times
+        since the epoch, or None if kw was never found.
+        """
+        entry = self.entries.get(self.key(kw))
+        return None if entry is None else tuple(entry)
+
+    def record(self, kw, when=None, hits=1):
+        """Record that kw was found hits times, last at time when, by default
+        now.
+        """
+        if when is None:
+            when = time.time()
+        self.merge(self.key(kw), when, when, hits)
+
+    def merge(self, key, first, last, hits):
+        """Merge an entry for canonical combination key into the store"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = [first, last, hits]
+            self._matcher = None
+        else:
+            entry[0] = min(entry[0], first)
+            entry[1] = max(entry[1], last)
+            entry[2] += hits
+
+    def ranked(self):
+        """Return the stored combinations, most found and then most recently
+        found first.
+        """
+        return sorted(self.entries, key=lambda key: (-self.entries[key][2],
+                                                     -self.entries[key][1]))
+
+    def matcher(self):
+        """Return a matcher.KeywordMatcher over the stored combinations,
+        ranked as by ranked() when it was built, which is rebuilt only once
+        a new combination has been recorded.
+        """
+        if self._matcher is None:
+            self._matcher = KeywordMatcher(self.ranked())
+        return self._matcher
+
+    def matches(self, text):
+        """Return the list of stored combinations present in text"""
+        return self.matcher().matches(text)
+
+    def load(self, path=None):
+        """Merge the combinations saved in path into the store"""
+        with open(path or self.path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved['ordered'] != self.ordered:
+            raise ValueError('store in %s has ordered=%s' %
+                             (path or self.path, saved['ordered']))
+        for kw, first, last, hits in saved['keywords']:
+            self.merge(self.key(kw), first, last, hits)
+
+    def save(self, path=None):
+        """Write the store to path, most found combinations first"""
+        path = path or self.path
+        if path is None:
+            raise ValueError('no store path given or set')
+        keywords = [[sorted(key) if not self.ordered else list(key)] +
+                    self.entries[key] for key in self.ranked()]
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'ordered': self.ordered, 'keywords': keywords}, f,
+                      ensure_ascii=False, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+
+def main():
+    import argparse
+    import tempfile
+    import corpus
+    import algorithms
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Isolate keyword combinations in several runs over the '
+                    'same corpus, each run seeded with the combinations '
+                    'stored by the previous ones.')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--articles', type=int, default=200,
+                        help='number of articles of each run')
+    parser.add_argument('--keywords', type=int, default=200)
+    parser.add_argument('--length', type=int, default=300)
+    parser.add_argument('--path',
+                        help='store to use, by default a temporary file')
+    args = parser.parse_args()
+    articles, keywords = corpus.generate(args.articles * args.runs,
+                                         args.keywords, length=args.length)
+    path = args.path or os.path.join(tempfile.mkdtemp(), 'keywords.json')
+    for run in range(args.runs):
+        # each run starts afresh from the saved store, as a new process would
+        start = time.perf_counter()
+        store = KeywordStore(path=path)
+        known = store.matcher()
+        load_time = time.perf_counter() - start
+        batch = articles[run*args.articles:(run+1)*args.articles]
+        sim = Simulator(batch, {frozenset(kw) for kw in keywords},
+                        store=store)
+        def is_censored(test):
+            separator = '\x00' # will be platform specific
+            return sim.send(separator.join(test))
+        for art in sim.get_articles():
+            kw = algorithms.known_first(art, is_censored, known)
+            sim.report_found_keyword(kw)
+        start = time.perf_counter()
+        for art in batch:
+            store.matches(art)
+        lookup_time = (time.perf_counter() - start) / len(batch)
+        store.save()
+        print('run %d: %.2f queries per article, %d combinations stored, '
+              'loaded in %.2f ms, %.3f ms per article lookup' %
+              (run, sim.queries / (sim.this_article + 1), len(store),
+               1000 * load_time, 1000 * lookup_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import json
+import time
+from collections import defaultdict
+
+
+class Tracer:
+    """
+    Wrap an is_censored callback, recording for each test the phase of the
+    algorithm which issued it (see spans.Probe), the length of the message,
+    the verdict and how long the callback took to return it.
+    Usage:
+        tracer = Tracer(is_censored) - wrap is_censored
+        was_censored = tracer(test) - use in place of is_censored
+        tracer.article = n - tag subsequent records with article n
+        tracer.save(path) - write records as JSON Lines
+        tracer.print_summary() - print per-phase histogram
+    """
+    def __init__(self, is_censored, separator_length=1,
+                 clock=time.perf_counter):
+        """
+        :param is_censored: callback returning whether a collection of strings
+        is censored
+        :param separator_length: length of the separator with which
+        is_censored joins the strings of a test
+        :param clock: function returning the current time in seconds
+        """
+        self.is_censored = is_censored
+        self.separator_length = separator_length
+        self.clock = clock
+        self.article = None
+        self.records = []
+
+    def __call__(self, test):
+        phase = getattr(test, 'phase', None) or 'other'
+        if hasattr(test, 'length'):
+            length = test.length(self.separator_length)
+        else:
+            test = list(test)
+            length = (sum(len(t) for t in test) +
+                      self.separator_length * max(len(test) - 1, 0))
+        start = self.clock()
+        was_censored = self.is_censored(test)
+        latency = self.clock() - start
+        self.records.append({
+            'article': self.article,
+            'phase': phase,
+            'length': length,
+            'censored': was_censored,
+            'latency': latency,
+        })
+        return was_censored
+
+    def save(self, path):
+        """Write the records to path, one JSON object per line"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+
+    def summary(self):
+        """Return a dict mapping each phase to its number of queries, total
+        latency and mean message length.
+        """
+        phases = defaultdict(lambda: {'queries': 0, 'latency': 0.0,
+                                      'length': 0})
+        for record in self.records:
+            phase = phases[record['phase']]
+            phase['queries'] += 1
+            phase['latency'] += record['latency']
+            phase['length'] += record['length']
+        for phase in phases.values():
+            phase['mean_length'] = phase.pop('length') / phase['queries']
+        return dict(phases)
+
+    def print_summary(self, width=40):
+        """Print the share of queries and of latency of each phase as a
+        histogram.
+        """
+        summary = self.summary()
+        queries = sum(phase['queries'] for phase in summary.values()) or 1
+        latency = sum(phase['latency'] for phase in summary.values()) or 1
+        for name, phase in sorted(summary.items(),
+                                  key=lambda item: -item[1]['queries']):
+            share = phase['queries'] / queries
+            print('%-13s %6d queries %5.1f%% %-*s %5.1f%% of latency, '
+                  'mean length %.1f' %
+                  (name, phase['queries'], 100 * share, width,
+                   '#' * round(width * share),
+                   100 * phase['latency'] / latency, phase['mean_length']))
+
+
+def main():
+    import argparse
+    import importlib
+    from simulator import Simulator
+    parser = argparse.ArgumentParser(
+        description='Trace the queries of an isolator over the simulator.')
+    parser.add_argument('--variant', default='algorithms')
+    parser.add_argument('--isolator', default='comp_aware_bin_split_2')
+    parser.add_argument('--output', help='write the trace as JSON Lines')
+    args = parser.parse_args()
+    module = importlib.import_module(args.variant)
+    isolator = getattr(module, args.isolator)
+    sim = Simulator()
+    def is_censored(test):
+        separator = '\x00' # will be platform specific
+        return sim.send(separator.join(test))
+    tracer = Tracer(is_censored)
+    for art in sim.get_articles():
+        tracer.article = sim.this_article
+        if hasattr(module, 'isolate'):
+            kw = module.isolate(isolator(art), sim, tracer)
+        else:
+            kw = isolator(art, tracer)
+        sim.report_found_keyword(kw)
+    tracer.print_summary()
+    if args.output:
+        tracer.save(args.output)
+
+if __name__ == "__main__":
+    main()